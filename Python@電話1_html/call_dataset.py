@@ -0,0 +1,226 @@
+"""
+発着信履歴の月別データセット（年単位の集計用）
+
+merge_final.py が月ごとの『発着信履歴_統合版.xlsx』と一緒に、同じ中身を
+シート × 月 のフォルダ（パーティション）に保存します。形式は xlsx_cache と同じ
+列ごとの .npy なので、Excel の行数上限も openpyxl のメモリも気にせず読めます。
+
+    発着信履歴_dataset/
+        外線着信/202512/partition.json   ← 元のエクスポート（期間）・行数・並び順
+        外線着信/202512/p0000/ ...        ← 書き出した順の塊（時刻順）
+
+期間を指定して読むと、元のエクスポートのファイル名の期間
+（発着信履歴_YYYYMMDD-YYYYMMDD.xlsx）が重ならない月は開きません。
+
+使い方（プログラムから）:
+    import call_dataset
+    df = call_dataset.load("発着信履歴_dataset", "外線着信", "2025-10-01", "2025-12-31")
+
+使い方（コマンド）:
+    python call_dataset.py --info [フォルダ]    保存されている月・行数を表示
+"""
+
+import os
+import json
+import shutil
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import sheet_schema
+import xlsx_cache
+
+# ============================================================
+# 設定
+# ============================================================
+DATASET_DIRNAME = "発着信履歴_dataset"
+PARTITION_FILE = "partition.json"
+
+# 保存形式を変えたら上げる（古い形式のパーティションは読まない）
+DATASET_VERSION = 1
+
+
+# ============================================================
+# 書き出し
+# ============================================================
+class MonthWriter:
+    """1か月分の全シートを一時フォルダに書き、commit() で入れ替える
+
+    途中で失敗したとき（abort()）は前回のパーティションがそのまま残る。
+    """
+
+    def __init__(self, dataset_dir, month, sources):
+        self.dataset_dir = dataset_dir
+        self.month = month
+        self.sources = sources      # [{"file": 名前, "start": YYYYMMDD, "end": YYYYMMDD}, ...]
+        self.tmp = os.path.join(dataset_dir, f".{month}.tmp{os.getpid()}")
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        self.parts = {}             # {シート: [行数, ...]}
+
+    def add(self, sheet_name, df):
+        """時刻順の塊を1つ追加する"""
+        if df.empty:
+            return
+        parts = self.parts.setdefault(sheet_name, [])
+        target = os.path.join(self.tmp, sheet_name, f"p{len(parts):04d}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        xlsx_cache.save_frame(target, df)
+        parts.append(len(df))
+
+    def tee(self, loaded):
+        """(出どころ, frames) をそのまま流しながら、各シートの塊を保存する"""
+        for label, frames in loaded:
+            for sheet_name, df in frames.items():
+                self.add(sheet_name, df)
+            yield label, frames
+
+    def commit(self, order=None):
+        """書いたシートのパーティションを入れ替える（この月に無くなったシートは消す）"""
+        for sheet_name in set(self.parts) | set(list_sheets(self.dataset_dir)):
+            final = partition_dir(self.dataset_dir, sheet_name, self.month)
+            parts = self.parts.get(sheet_name)
+            if not parts:
+                shutil.rmtree(final, ignore_errors=True)
+                continue
+            src = os.path.join(self.tmp, sheet_name)
+            info = {
+                "version": DATASET_VERSION,
+                "sheet": sheet_name,
+                "month": self.month,
+                "rows": sum(parts),
+                "parts": [f"p{i:04d}" for i in range(len(parts))],
+                "order": order,
+                "sources": self.sources,
+            }
+            with open(os.path.join(src, PARTITION_FILE), "w", encoding="utf-8") as f:
+                json.dump(info, f, ensure_ascii=False, indent=2)
+            old = f"{final}.old{os.getpid()}"
+            if os.path.isdir(final):
+                os.rename(final, old)
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            os.rename(src, final)
+            shutil.rmtree(old, ignore_errors=True)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def abort(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def partition_dir(dataset_dir, sheet_name, month):
+    return os.path.join(dataset_dir, sheet_name, month)
+
+
+# ============================================================
+# 読み込み
+# ============================================================
+def list_sheets(dataset_dir):
+    if not os.path.isdir(dataset_dir):
+        return []
+    return sorted(n for n in os.listdir(dataset_dir)
+                  if not n.startswith(".") and os.path.isdir(os.path.join(dataset_dir, n)))
+
+
+def partitions(dataset_dir, sheet_name):
+    """シートの全パーティションの情報（partition.json）を月順に返す"""
+    result = []
+    sheet_dir = os.path.join(dataset_dir, sheet_name)
+    if not os.path.isdir(sheet_dir):
+        return result
+    for month in sorted(os.listdir(sheet_dir)):
+        try:
+            with open(os.path.join(sheet_dir, month, PARTITION_FILE), encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            continue  # 書きかけ・壊れたもの
+        if info.get("version") == DATASET_VERSION:
+            info["dir"] = os.path.join(sheet_dir, month)
+            result.append(info)
+    return result
+
+
+def has_month(dataset_dir, month):
+    """その月のパーティションが1つでもあるか"""
+    return any(os.path.exists(os.path.join(partition_dir(dataset_dir, n, month), PARTITION_FILE))
+               for n in list_sheets(dataset_dir))
+
+
+def _day(value):
+    """'2025-12-01' / '20251201' / Timestamp → 'YYYYMMDD'"""
+    return pd.Timestamp(value).strftime("%Y%m%d")
+
+
+def prune(infos, start=None, end=None):
+    """期間 [start, end] と元のエクスポートの期間が重なるパーティションだけを残す"""
+    lo = _day(start) if start is not None else "00000000"
+    hi = _day(end) if end is not None else "99999999"
+    result = []
+    for info in infos:
+        month = info["month"]
+        if month < lo[:6] or month > hi[:6]:
+            continue
+        sources = info.get("sources") or []
+        if sources and not any(s["start"] <= hi and s["end"] >= lo for s in sources):
+            continue
+        result.append(info)
+    return result
+
+
+def _slice_time(df, start, end, ordered):
+    """時刻で [start, end] の日の行を取り出す（時刻順なら二分探索）"""
+    if '時刻' not in df.columns or (start is None and end is None):
+        return df
+    t = df['時刻']
+    lo = pd.Timestamp(_day(start)) if start is not None else None
+    hi = pd.Timestamp(_day(end)) + pd.Timedelta(days=1) if end is not None else None
+    if ordered:
+        values = t.to_numpy()
+        i = np.searchsorted(values, np.datetime64(lo), side="left") if lo is not None else 0
+        j = np.searchsorted(values, np.datetime64(hi), side="left") if hi is not None else t.notna().sum()
+        return df.iloc[i:j].reset_index(drop=True)
+    keep = t.notna()
+    if lo is not None:
+        keep &= t >= lo
+    if hi is not None:
+        keep &= t < hi
+    return df[keep].reset_index(drop=True)
+
+
+def load(dataset_dir, sheet_name, start=None, end=None):
+    """期間を指定してシートを読む（start / end は日付。省略すると端まで）
+
+    期間を指定したときは、時刻が空の行は含まれません。
+    """
+    frames = []
+    for info in prune(partitions(dataset_dir, sheet_name), start, end):
+        parts = [xlsx_cache.load_frame(os.path.join(info["dir"], p)) for p in info["parts"]]
+        df = sheet_schema.concat(parts)
+        frames.append(_slice_time(df, start, end, info.get("order") == '時刻'))
+    return sheet_schema.concat(frames)
+
+
+# ============================================================
+# コマンド
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="発着信履歴の月別データセットの確認")
+    parser.add_argument("dataset_dir", nargs="?",
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), DATASET_DIRNAME))
+    parser.add_argument("--info", action="store_true", help="保存されている月・行数を表示（既定）")
+    args = parser.parse_args()
+
+    print(f"場所: {args.dataset_dir}")
+    sheets = list_sheets(args.dataset_dir)
+    if not sheets:
+        print("データセットがありません（merge_final.py を実行すると作られます）")
+        return
+    for sheet_name in sheets:
+        print(f"■ {sheet_name}")
+        for info in partitions(args.dataset_dir, sheet_name):
+            files = len(info.get("sources") or [])
+            order = "時刻順" if info.get("order") else "並び順なし"
+            print(f"  {info['month']}: {info['rows']:>8,} 行（元ファイル {files} 個, {order}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,804 @@
+"""
+発着信履歴の統合（全月共通）
+
+CallDataMerge2025MM フォルダ（の下の 対象データ入れる）に置いた
+「発着信履歴_YYYYMMDD-YYYYMMDD.xlsx」をまとめて探し、月ごとに
+『発着信履歴_統合版.xlsx』を作ります。出力先はその月のエクスポートがあるフォルダです。
+
+    python merge_final.py                              このフォルダの下の全月
+    python merge_final.py --from 202510 --to 202512    10月〜12月だけ
+    python merge_final.py D:\\電話データ --from 202512   別の場所を探す
+
+同じ内容を月別データセット（既定: 探すフォルダの 発着信履歴_dataset）にも保存します。
+年単位の集計は call_dataset.load() で必要な月だけを読んでください。
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import re
+import argparse
+import hashlib
+import heapq
+import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# シートのレイアウト登録簿（ヘッダーの崩れ方ごとの正しい列名）
+import sheet_schema
+
+# 読み込みキャッシュ（同じフォルダの xlsx_cache.py）。無ければ毎回Excelを読む
+try:
+    import xlsx_cache
+except ImportError:
+    xlsx_cache = None
+
+# 月別データセット（同じフォルダの call_dataset.py）。無ければ統合版のExcelだけを作る
+try:
+    import call_dataset
+except ImportError:
+    call_dataset = None
+
+# --- 設定：出力ファイル名 ---
+OUTPUT_FILENAME = "発着信履歴_統合版.xlsx"
+
+# --- 設定：統合するエクスポートのファイル名（期間の開始日-終了日） ---
+EXPORT_PATTERN = re.compile(r"^発着信履歴_(\d{8})-(\d{8})\.xlsx$")
+
+# --- 設定：差分統合用の管理ファイル ---
+# 前回読み込んだファイルの情報（サイズ・更新日時・ハッシュ・行数）を記録し、
+# 変更のないファイルは読み込み済みデータ（xlsx_cache）を使い回します
+MANIFEST_FILENAME = "発着信履歴_統合版.manifest.json"
+# 読み込み処理（ヘッダー修正など）を変えたら上げる → 全ファイル読み直しになります
+MANIFEST_VERSION = 3
+
+# --- 設定：並列読み込みのプロセス数 ---
+# 0 = CPUコア数に合わせて自動 / 1 = 従来どおり1ファイルずつ読み込む
+DEFAULT_WORKERS = 0
+
+# 縦に積み上げるシート（この順番で出力されます）
+MERGE_SHEETS = ["内線通話", "外線発信", "外線着信"]
+
+# --- 設定：出力の並び順 ---
+# 各ファイルを時刻順に並べてから、ファイル同士を時刻順に突き合わせて（k-way マージ）出力します。
+# 並び順は統合版のファイル情報（ユーザー設定プロパティ「並び順」）と管理ファイルに記録されます
+SORT_COLUMN = '時刻'
+SORT_PROPERTY = '並び順'
+
+# --- 設定：重複行の判定 ---
+# 期間が重なったエクスポートや再エクスポートで同じ通話が二重に入るのを防ぎます。
+# リクエストIDが同じ行は同じ通話。IDが空の行は下の列の組み合わせで判定します
+DEDUP_ID_COLUMN = "リクエストID"
+DEDUP_FALLBACK_COLUMNS = {
+    "内線通話": ['時刻', '発信番号', '最終着信者名'],  # 最終着信者名 = 元データの「着信番号」列
+    "外線発信": ['時刻', '発信番号', '着信番号'],
+    "外線着信": ['時刻', '発信番号', '着信番号'],
+}
+
+
+def fix_columns(sheet_name, columns):
+    """統合後の列名を返す: (列名, レイアウト名, 注意メッセージ)。取り込まないシートは列名が None
+
+    ヘッダー行の指紋を sheet_schema の登録簿と照合して、崩れたヘッダーを直す。
+    """
+    if sheet_name not in MERGE_SHEETS:
+        return None, None, None
+    return sheet_schema.resolve(sheet_name, columns)
+
+
+def load_export(file_path, sha=None):
+    """1ファイル分を読み込み、統合対象シートとメッセージを返す（別プロセスから呼ばれる）"""
+    frames = {}
+    messages = []
+
+    try:
+        # 全シート読み込み（2回目以降はキャッシュから）
+        if xlsx_cache:
+            xls_data = xlsx_cache.read_excel(file_path, sheet_name=None, sha=sha)
+        else:
+            xls_data = pd.read_excel(file_path, sheet_name=None)
+
+        # --- シートごとの処理 ---
+        for sheet_name in MERGE_SHEETS:
+            if sheet_name not in xls_data:
+                continue
+            df = xls_data[sheet_name]
+            columns, _, note = fix_columns(sheet_name, list(df.columns))
+            if note:
+                messages.append(f"  [!] 注意: {os.path.basename(file_path)} の「{sheet_name}」は{note}")
+            df.columns = columns
+            # 列の型をそろえる（名前は category、秒数は int32 など）。そろえられなければ読んだままの型で取り込む
+            try:
+                frames[sheet_name] = sheet_schema.apply_types(sheet_name, df)
+            except Exception as e:
+                messages.append(f"  [!] 注意: {os.path.basename(file_path)} の「{sheet_name}」は列の型をそろえられませんでした"
+                                f"（{e}）→ 読んだままの型で取り込みました")
+                frames[sheet_name] = df
+
+    except Exception as e:
+        # 途中まで読めたシートだけを渡すと欠けたまま記録されるため、ファイルごと失敗にする（次回また読み直す）
+        messages.append(f"  [!] エラー: {os.path.basename(file_path)} を読み込めませんでした: {e}")
+        frames = {}
+
+    return frames, messages
+
+
+def read_columns(file_path, sha=None):
+    """ヘッダー行だけを読み、統合後の列名をシートごとに返す（本体は読まない）"""
+    if xlsx_cache and xlsx_cache.is_cached(file_path, sheet_name=None, sha=sha):
+        xls_data = xlsx_cache.read_excel(file_path, sheet_name=None, sha=sha)
+        headers = {name: list(df.columns) for name, df in xls_data.items()}
+    else:
+        headers = sheet_schema.read_headers(file_path)
+
+    result = {}
+    for sheet_name in MERGE_SHEETS:
+        if sheet_name in headers:
+            columns, _, _ = fix_columns(sheet_name, headers[sheet_name])
+            result[sheet_name] = columns
+    return result
+
+
+def file_sha256(file_path):
+    """ファイル内容のハッシュ（同じ中身なら同じ値）"""
+    if xlsx_cache:
+        return xlsx_cache.file_sha256(file_path)
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(out_dir):
+    """前回の管理ファイルを読む: (ファイルごとの記録, 並び順)。無い・壊れている・版が違う場合は空
+
+    管理ファイルは月の出力フォルダに置き、ファイルはそこからの相対パスで記録する。
+    """
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILENAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            files = {os.path.normpath(os.path.join(out_dir, k)): v
+                     for k, v in manifest.get("files", {}).items()}
+            return files, manifest.get("order")
+    except (OSError, ValueError):
+        pass
+    return {}, None
+
+
+def save_manifest(out_dir, entries, order=None):
+    """管理ファイルを書く。order は統合版の並び順（時刻順でなければ None）"""
+    files = {os.path.relpath(k, out_dir): v for k, v in entries.items()}
+    with open(os.path.join(out_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "order": order, "files": files},
+                  f, ensure_ascii=False, indent=2)
+
+
+def is_cached(file_path, sha):
+    return bool(xlsx_cache) and xlsx_cache.is_cached(file_path, sheet_name=None, sha=sha)
+
+
+class ExportLoader:
+    """全月の読み込み対象を1つのプロセスプールで先読みする
+
+    get() は月順・ファイル名順に呼ばれる前提で、その少し先までを並列に読ませておく。
+    月をまたぐエクスポートは2か月分で使うので、両方で使い終わるまで結果を持っておく。
+    """
+
+    def __init__(self, to_parse, shas, workers):
+        self.order = list(dict.fromkeys(to_parse))
+        self.uses = Counter(to_parse)
+        self.shas = shas
+        self.pool = None
+        if workers > 1 and len(self.order) > 1:
+            print(f"（{workers}プロセスで並列に読み込みます）")
+            self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.ahead = workers * 2
+        self.futures = {}
+        self.submitted = 0
+
+    def get(self, file_path):
+        """to_parse のファイルを読み込んだ結果 (frames, messages) を返す"""
+        if self.pool:
+            # 使う順に投入しておく（先読みは ahead 個まで＝読み終わったデータを溜めすぎない）
+            limit = self.order.index(file_path) + self.ahead
+            while self.submitted < len(self.order) and self.submitted <= limit:
+                f = self.order[self.submitted]
+                self.futures[f] = self.pool.submit(load_export, os.path.abspath(f), self.shas[f])
+                self.submitted += 1
+            frames, messages = self.futures[file_path].result()
+        else:
+            frames, messages = load_export(file_path, self.shas[file_path])
+
+        self.uses[file_path] -= 1
+        if self.uses[file_path] <= 0:
+            self.futures.pop(file_path, None)
+        return dict(frames), list(messages)
+
+    def shutdown(self):
+        if self.pool:
+            self.pool.shutdown()
+
+
+def iter_exports(all_files, to_parse, loader, shas):
+    """月内の全ファイルの読み込み結果をファイル名順に1つずつ返す
+
+    to_parse のファイルは共有のプロセスプール（loader）から受け取り、
+    それ以外（変更なし）はキャッシュから読む。
+    """
+    for file_path in all_files:
+        if file_path in to_parse:
+            print(f"・読み込み: {file_path}")
+            frames, messages = loader.get(file_path)
+            yield file_path, frames, messages, True
+        else:
+            frames, messages = load_export(file_path, shas[file_path])
+            yield file_path, frames, messages, False
+
+
+def find_exports(root, exclude=None):
+    """root の下（サブフォルダを含む）からエクスポートを探す: {パス: (開始月, 終了月)}"""
+    found = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        if exclude:
+            dirnames[:] = [d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) != exclude]
+        dirnames.sort()
+        for name in sorted(filenames):
+            m = EXPORT_PATTERN.match(name)
+            if m:
+                found[os.path.normpath(os.path.join(dirpath, name))] = (m.group(1)[:6], m.group(2)[:6])
+    return found
+
+
+def month_range(start, end):
+    """'202510', '202512' → ['202510', '202511', '202512']"""
+    months = []
+    y, m = int(start[:4]), int(start[4:])
+    while f"{y:04d}{m:02d}" <= end:
+        months.append(f"{y:04d}{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
+
+
+def plan_months(exports, month_from=None, month_to=None):
+    """エクスポートを月に振り分ける: {月: {"dir": 出力フォルダ, "files": [パス...]}}
+
+    期間が月をまたぐファイルは両方の月に入れる（行は読み込み後に 時刻 で振り分け）。
+    出力フォルダは、その月に始まるエクスポートが一番多く置かれているフォルダ。
+    """
+    plan = {}
+    for file_path, (start, end) in sorted(exports.items(), key=lambda kv: (kv[1], kv[0])):
+        for month in month_range(start, end):
+            if (month_from and month < month_from) or (month_to and month > month_to):
+                continue
+            plan.setdefault(month, {"files": [], "starts": []})
+            plan[month]["files"].append(file_path)
+            if start == month:
+                plan[month]["starts"].append(os.path.dirname(file_path))
+
+    for month, p in plan.items():
+        dirs = p.pop("starts") or [os.path.dirname(f) for f in p["files"]]
+        p["dir"] = Counter(dirs).most_common(1)[0][0] or "."
+    return dict(sorted(plan.items()))
+
+
+def month_label(month):
+    return f"{month[:4]}年{int(month[4:])}月"
+
+
+def select_month(frames, month, first_month):
+    """月をまたぐエクスポートから、その月の行だけを取り出す（時刻が空の行は開始月に入れる）"""
+    result = {}
+    for sheet_name, df in frames.items():
+        if '時刻' not in df.columns:
+            result[sheet_name] = df if month == first_month else df.iloc[0:0]
+            continue
+        t = pd.to_datetime(df['時刻'], errors='coerce')
+        keep = t.dt.strftime('%Y%m') == month
+        if month == first_month:
+            keep |= t.isna()
+        result[sheet_name] = df[keep].reset_index(drop=True)
+    return result
+
+
+# 信用するIDの型（整数・文字列。bool は int の仲間だが type で比べるので入らない）
+_ID_TYPES = [int, str, np.int8, np.int16, np.int32, np.int64, np.uint8, np.uint16, np.uint32, np.uint64]
+
+
+def _has_id(ids):
+    """IDとして信用できる行（整数・文字列）。型の決まった列は列の型で、混ざった列は値の型で判定する"""
+    if pd.api.types.is_bool_dtype(ids) or pd.api.types.is_float_dtype(ids):
+        return pd.Series(False, index=ids.index)
+    if pd.api.types.is_integer_dtype(ids) or isinstance(ids.dtype, pd.StringDtype):
+        return ids.notna()
+    return ids.map(type).isin(_ID_TYPES).astype(bool)
+
+
+def _key_text(s):
+    """重複判定のキー用の文字（列ごとにまとめて変換。日時はファイルごとに書式が変わらないよう書式を決めて）"""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.dt.strftime('%Y-%m-%d %H:%M:%S.%f').fillna('NaT')
+    return s.astype(str).fillna('nan')
+
+
+def drop_duplicates(df, sheet_name, seen):
+    """既に出力した通話（seen に登録済みのキー）とファイル内の重複を除く
+
+    seen はシートごとのキーの集合で、ファイルをまたいで使い回す。
+    返り値は (重複を除いた DataFrame, 除いた行数)。
+    """
+    if DEDUP_ID_COLUMN in df.columns:
+        ids = df[DEDUP_ID_COLUMN]
+        # 整数・文字列のIDだけを信用する（桁落ちした小数のIDは別々の通話が同じ値になりうる）
+        has_id = _has_id(ids)
+    else:
+        ids = pd.Series(None, index=df.index, dtype=object)
+        has_id = pd.Series(False, index=df.index)
+
+    fallback = [c for c in DEDUP_FALLBACK_COLUMNS.get(sheet_name, []) if c in df.columns]
+    if not has_id.all() and not fallback:
+        return df, 0  # 判定に使える列が無い
+
+    keys = pd.Series("", index=df.index, dtype=object)
+    keys[has_id] = "id:" + ids[has_id].astype(str)
+    if not has_id.all():
+        # 空欄も "nan" などの文字にして比較する
+        parts = [_key_text(df.loc[~has_id, c]) for c in fallback]
+        row_keys = "row:" + parts[0]
+        for part in parts[1:]:
+            row_keys = row_keys + "|" + part
+        keys[~has_id] = row_keys
+
+    drop = keys.duplicated() | keys.isin(seen)
+    seen.update(keys[~drop])
+    removed = int(drop.sum())
+    if removed:
+        df = df[~drop].reset_index(drop=True)
+    return df, removed
+
+
+def sort_keys(df):
+    """並べ替え用の整数（時刻をナノ秒にしたもの）。時刻が空・日時でない行は最後に回す"""
+    if SORT_COLUMN not in df.columns:
+        return np.full(len(df), np.iinfo(np.int64).max, dtype=np.int64)
+    t = pd.to_datetime(df[SORT_COLUMN], errors='coerce').astype('datetime64[ns]')
+    keys = t.to_numpy().view(np.int64).copy()
+    keys[t.isna().to_numpy()] = np.iinfo(np.int64).max
+    return keys
+
+
+def sort_export(df):
+    """1ファイル分を時刻順にする（エクスポートはほぼ時刻順なので、並んでいればそのまま）"""
+    keys = sort_keys(df)
+    if len(keys) < 2 or (keys[1:] >= keys[:-1]).all():
+        return df, keys
+    order = np.argsort(keys, kind='stable')
+    return df.iloc[order].reset_index(drop=True), keys[order]
+
+
+class TimeOrderedMerger:
+    """ファイルごとに時刻順にした行を、ファイル同士で時刻順に突き合わせて（k-way マージ）渡す
+
+    ファイルはファイル名の開始日の順に来る。次のファイルの開始日より前の行は
+    もう後から来ないので、そこまでをマージして渡し、残りだけを持っておく。
+    """
+
+    def __init__(self, starts):
+        self.starts = starts      # {ファイル: 期間の開始日（並べ替え用の整数）}
+        self.pending = {}         # {シート: [(ファイル, DataFrame, keys), ...]}
+        self.flushed = np.iinfo(np.int64).min
+        self.late = 0             # 開始日より前の時刻だったため順番どおりに出せなかった行
+
+    def feed(self, loaded):
+        """(ファイル, frames) を受け取り、時刻順の (出どころ, frames) を返す"""
+        for file_path, frames in loaded:
+            start = self.starts.get(file_path)
+            if start is not None and start > self.flushed:
+                yield from self._flush(start)
+                self.flushed = start
+
+            for sheet_name, df in frames.items():
+                df, keys = sort_export(df)
+                late = int((keys < self.flushed).sum())
+                if late:
+                    print(f"  [!] 注意: {file_path} の「{sheet_name}」に期間の開始日より前の行が {late} 行あります（時刻順になりません）")
+                    self.late += late
+                self.pending.setdefault(sheet_name, []).append((file_path, df, keys))
+
+        yield from self._flush(np.iinfo(np.int64).max, final=True)
+
+    def _flush(self, limit, final=False):
+        """limit より前の行（final なら全部）をマージして渡す"""
+        sources = set()
+        frames = {}
+        for sheet_name, pieces in self.pending.items():
+            heads, rest = [], []
+            for file_path, df, keys in pieces:
+                n = len(keys) if final else int(np.searchsorted(keys, limit, side='left'))
+                if n:
+                    heads.append((df.iloc[:n], keys[:n]))
+                    sources.add(file_path)
+                if n < len(keys):
+                    rest.append((file_path, df.iloc[n:].reset_index(drop=True), keys[n:]))
+            self.pending[sheet_name] = rest
+            if heads:
+                frames[sheet_name] = merge_sorted(heads)
+        if frames:
+            yield "、".join(os.path.basename(f) for f in sorted(sources)), frames
+
+
+def merge_sorted(pieces):
+    """時刻順の DataFrame のリストを k-way マージする（同じ時刻はリストの順＝先のファイルが先）"""
+    if len(pieces) == 1:
+        return pieces[0][0].reset_index(drop=True)
+    offsets = np.cumsum([0] + [len(keys) for _, keys in pieces[:-1]])
+    streams = [zip(keys.tolist(), range(off, off + len(keys))) for (_, keys), off in zip(pieces, offsets)]
+    order = [pos for _, pos in heapq.merge(*streams)]
+    combined = sheet_schema.concat([df for df, _ in pieces])
+    return combined.take(order).reset_index(drop=True)
+
+
+def iter_rows(df):
+    """DataFrame を1行ずつ値のタプルで返す（NaN/NaT は空セル）"""
+    values = df.astype(object).where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def set_sort_property(wb, order):
+    """統合版のファイル情報に並び順を書いておく（読む側が時刻の範囲検索などに使える）"""
+    from openpyxl.packaging.custom import StringProperty
+    if order:
+        wb.custom_doc_props.append(StringProperty(name=SORT_PROPERTY, value=order))
+
+
+def write_streaming(output_path, columns, loaded, order=None):
+    """読み込んだファイルから順に行を書き出す（統合版全体をメモリに持たない）"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Border, Side, Alignment
+
+    thin = Side(style="thin")
+    header_font = Font(bold=True)
+    header_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_align = Alignment(horizontal="center", vertical="top")
+
+    wb = Workbook(write_only=True)
+    sheets = {}
+    # シートは MERGE_SHEETS の順で先に作っておく（データの来る順に関係なく同じ並び）
+    for sheet_name in MERGE_SHEETS:
+        if not columns.get(sheet_name):
+            continue
+        ws = wb.create_sheet(sheet_name)
+        header = []
+        for col in columns[sheet_name]:
+            cell = WriteOnlyCell(ws, value=col)
+            cell.font = header_font
+            cell.border = header_border
+            cell.alignment = header_align
+            header.append(cell)
+        ws.append(header)
+        sheets[sheet_name] = ws
+
+    counts = {k: 0 for k in sheets}
+    for file_path, frames in loaded:
+        for sheet_name, df in frames.items():
+            if sheet_name not in sheets:
+                print(f"  [!] 注意: {file_path} の「{sheet_name}」はヘッダー行を読めなかったため出力されません")
+                continue
+            extra = [c for c in df.columns if c not in columns[sheet_name]]
+            if extra:
+                print(f"  [!] 注意: {file_path} の「{sheet_name}」の列 {extra} はヘッダー行に無いため出力されません")
+            ws = sheets[sheet_name]
+            for row in iter_rows(df.reindex(columns=columns[sheet_name])):
+                ws.append(row)
+            counts[sheet_name] += len(df)
+
+    set_sort_property(wb, order() if callable(order) else order)
+    wb.save(output_path)
+    return counts
+
+
+def combine(loaded):
+    """シートごとに全ファイルを縦に結合する: {シート名: DataFrame}（MERGE_SHEETS の順、データの無いシートは無し）"""
+    store = {k: [] for k in MERGE_SHEETS}
+    for file_path, frames in loaded:
+        for sheet_name, df in frames.items():
+            store[sheet_name].append(df)
+    # 時刻順のマージは loaded の側で済んでいる
+    return {k: sheet_schema.concat(v) for k, v in store.items() if v}
+
+
+def write_frames(output_path, combined, order=None):
+    """結合済みのシートを書き出す"""
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        for sheet_name, combined_df in combined.items():
+            combined_df.to_excel(writer, sheet_name=sheet_name, index=False)
+        set_sort_property(writer.book, order() if callable(order) else order)
+    return {k: len(df) for k, df in combined.items()}
+
+
+def write_in_memory(output_path, loaded, order=None):
+    """従来の方法：シートごとに全ファイルを結合してから書き出す"""
+    return write_frames(output_path, combine(loaded), order)
+
+
+def prepare_month(month, plan, full):
+    """前回から変わったファイルだけを読み込み対象にする
+
+    返り値は (管理ファイルの記録, 読み込み対象, 前回から削除されたファイル, 前回の並び順)。
+    """
+    out_dir = plan["dir"]
+    old_entries, old_order = ({}, None) if full else load_manifest(out_dir)
+    entries = {}
+    to_parse = []
+
+    for file_path in plan["files"]:
+        st = os.stat(file_path)
+        old = old_entries.get(file_path)
+        # サイズと更新日時が同じならハッシュ計算も省略
+        if old and old["size"] == st.st_size and old["mtime"] == st.st_mtime:
+            sha = old["sha256"]
+        else:
+            sha = file_sha256(file_path)
+
+        if old and old["sha256"] == sha and is_cached(file_path, sha):
+            entries[file_path] = dict(old, size=st.st_size, mtime=st.st_mtime)
+            continue
+
+        to_parse.append(file_path)
+        entries[file_path] = {"path": os.path.relpath(file_path, out_dir),
+                              "size": st.st_size, "mtime": st.st_mtime, "sha256": sha}
+
+    removed = [f for f in old_entries if f not in entries]
+    return entries, to_parse, removed, old_order
+
+
+def merge_month(month, plan, entries, to_parse, loader, exports, args, dataset_dir=None,
+                frames=None, write_excel=True):
+    """1か月分を統合して保存する（dataset_dir があれば月別データセットにも書く）
+
+    frames に dict を渡すと、統合したシートを DataFrame のまま入れて返す（パイプライン用）。
+    そのとき write_excel=False なら統合版のExcelは書かない（管理ファイルも更新しない）。
+    """
+    all_files = plan["files"]
+    output_path = os.path.join(plan["dir"], OUTPUT_FILENAME)
+    shas = {f: e["sha256"] for f, e in entries.items()}
+
+    # 時刻順に出力する（--no-sort のときは従来どおりファイル名順に積み上げる）
+    merger = None
+    if not args.no_sort:
+        starts = {}
+        for file_path in all_files:
+            start = EXPORT_PATTERN.match(os.path.basename(file_path)).group(1)
+            starts[file_path] = pd.Timestamp(start).as_unit('ns').value
+        merger = TimeOrderedMerger(starts)
+
+    def order():
+        """統合版の並び順（順番どおりに出せない行があったときは記録しない）"""
+        return SORT_COLUMN if merger and merger.late == 0 else None
+
+    seen = {k: set() for k in MERGE_SHEETS}
+    total_removed = 0
+
+    def loaded():
+        """読み込み結果を管理ファイルに記録しながら、ファイル名順に frames を渡す"""
+        nonlocal total_removed
+        for file_path, frames, messages, parsed in iter_exports(all_files, to_parse, loader, shas):
+            entry = entries[file_path]
+            if not parsed:
+                messages = entry.get("messages", [])
+            for msg in messages:
+                print(msg)
+            entry["rows"] = {k: len(df) for k, df in frames.items()}
+            entry["messages"] = messages
+            # 読み込みに失敗したファイルは記録せず、次回また読み直す
+            if not frames:
+                del entries[file_path]
+
+            # 月をまたぐエクスポートは、この月の行だけを使う
+            start, end = exports[file_path]
+            if start != end:
+                frames = select_month(frames, month, start)
+
+            # 前のファイルと重なっている通話を除く（先に出たファイルを優先）
+            if not args.keep_duplicates:
+                removed = {}
+                for sheet_name, df in frames.items():
+                    frames[sheet_name], removed[sheet_name] = drop_duplicates(df, sheet_name, seen[sheet_name])
+                removed = {k: v for k, v in removed.items() if v}
+                if removed:
+                    detail = ", ".join(f"{k} {v}行" for k, v in removed.items())
+                    print(f"  重複を除外: {file_path}（{detail}）")
+                    total_removed += sum(removed.values())
+                if file_path in entries:
+                    entry["duplicates"] = removed
+            yield file_path, frames
+
+    print("統合ファイルを作成しています...")
+    rows = merger.feed(loaded()) if merger else loaded()
+    dataset = None
+    if dataset_dir:
+        sources = []
+        for file_path in all_files:
+            m = EXPORT_PATTERN.match(os.path.basename(file_path))
+            sources.append({"file": os.path.basename(file_path), "start": m.group(1), "end": m.group(2)})
+        dataset = call_dataset.MonthWriter(dataset_dir, month, sources)
+        rows = dataset.tee(rows)
+
+    try:
+        if frames is not None:
+            frames.update(combine(rows))
+            counts = {k: len(df) for k, df in frames.items()}
+            if write_excel:
+                write_frames(output_path, frames, order)
+        elif args.in_memory:
+            counts = write_in_memory(output_path, rows, order)
+        else:
+            # 出力のヘッダー行を先に決める（全ファイルの列をファイル名順に合わせたもの）
+            columns = {}
+            for file_path in all_files:
+                try:
+                    file_columns = read_columns(file_path, shas[file_path])
+                except Exception:
+                    file_columns = {}  # 読めないファイルは本体の読み込み時にエラー表示される
+                for sheet_name, cols in file_columns.items():
+                    merged = columns.setdefault(sheet_name, [])
+                    merged.extend(c for c in cols if c not in merged)
+            counts = write_streaming(output_path, columns, rows, order)
+
+        for sheet_name in MERGE_SHEETS:
+            if sheet_name in counts:
+                print(f"  OK: {sheet_name} ({counts[sheet_name]}行)")
+            else:
+                print(f"  SKIP: {sheet_name} (データなし)")
+        if total_removed:
+            print(f"  ※ 重複していた {total_removed} 行を除外しました")
+        if order():
+            print(f"  ※ 各シートは {SORT_COLUMN} 順に並んでいます")
+
+        # 出力が成功したときだけデータセットと管理ファイルを更新する
+        if dataset:
+            dataset.commit(order())
+        if write_excel or frames is None:
+            save_manifest(plan["dir"], entries, order())
+            print(f"  → 『{output_path}』 を作成しました。")
+        return True
+
+    except PermissionError:
+        print(f"\n【エラー】『{output_path}』が開かれています。閉じてから再実行してください。")
+        return False
+    finally:
+        if dataset:
+            dataset.abort()  # commit 済みなら一時フォルダはもう無い
+
+
+def merge_frames(root, month=None, write_excel=False, dataset_dir=None, workers=DEFAULT_WORKERS):
+    """1か月分を統合して (月, {シート名: DataFrame}) を返す（パイプライン用。見つからなければ (None, None)）
+
+    month を省略すると一番新しい月。読み込みキャッシュと管理ファイルは merge_final 単体の実行と共用。
+    write_excel=True なら統合版のExcelも従来どおり出力フォルダに書く。
+    """
+    exports = find_exports(root, exclude=dataset_dir)
+    plan = plan_months(exports, month, month)
+    if not plan:
+        return None, None
+    month = month or max(plan)
+    p = plan[month]
+
+    entries, to_parse, removed, old_order = prepare_month(month, p, full=False)
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    loader = ExportLoader(to_parse, {f: e["sha256"] for f, e in entries.items()}, max(1, min(workers, len(to_parse))))
+    args = argparse.Namespace(no_sort=False, keep_duplicates=False, in_memory=True)
+    frames = {}
+    try:
+        print(f"===== {month_label(month)}（{p['dir']}） =====")
+        print(f"読み込み対象: {len(to_parse)} 個（残り {len(p['files']) - len(to_parse)} 個は前回の結果を使用）")
+        if not merge_month(month, p, entries, to_parse, loader, exports, args, dataset_dir,
+                           frames=frames, write_excel=write_excel):
+            return month, None
+    finally:
+        loader.shutdown()
+    return month, frames
+
+
+def main():
+    print("--- 処理開始 ---")
+
+    parser = argparse.ArgumentParser(description="発着信履歴のExcelを月ごとに1つに統合します")
+    parser.add_argument("root", nargs="?", default=None,
+                        help="エクスポートを探すフォルダ（サブフォルダも探す。既定はこのファイルのあるフォルダ）")
+    parser.add_argument("--from", dest="month_from", metavar="YYYYMM",
+                        help="この月から統合する（例: 202510）")
+    parser.add_argument("--to", dest="month_to", metavar="YYYYMM",
+                        help="この月まで統合する（例: 202512）")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help="並列読み込みのプロセス数（0=自動, 1=並列なし）")
+    parser.add_argument("--full", action="store_true",
+                        help="管理ファイルを無視して作り直す（読み込みキャッシュも捨てる場合は xlsx_cache.py --clear）")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="リクエストIDが同じ行（重複）を除かずにそのまま出力する")
+    parser.add_argument("--no-sort", action="store_true",
+                        help="時刻順に並べず、ファイル名順に積み上げる（従来の出力）")
+    parser.add_argument("--dataset", metavar="フォルダ",
+                        help="月別データセットの保存先（既定: 探すフォルダの 発着信履歴_dataset）")
+    parser.add_argument("--no-dataset", action="store_true",
+                        help="月別データセットを作らない（統合版のExcelだけ）")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="従来どおり全データを結合してから書き出す（既定は1ファイルずつ書き出す）")
+    args = parser.parse_args()
+
+    for value in (args.month_from, args.month_to):
+        if value and not re.fullmatch(r"\d{4}(0[1-9]|1[0-2])", value):
+            parser.error(f"月は YYYYMM の形で指定してください: {value}")
+
+    # 1. 実行場所の固定（探すフォルダを基準にする）
+    root = args.root or os.path.dirname(os.path.abspath(__file__))
+    try:
+        os.chdir(root)
+    except OSError:
+        print(f"【エラー】フォルダが見つかりません: {root}")
+        input("Enterキーを押して終了してください...")
+        return
+
+    dataset_dir = None
+    if call_dataset and not args.no_dataset:
+        dataset_dir = os.path.abspath(args.dataset or call_dataset.DATASET_DIRNAME)
+
+    # 2. エクスポートを探して月ごとに振り分ける（データセットの中は探さない）
+    exports = find_exports(".", exclude=dataset_dir)
+    plan = plan_months(exports, args.month_from, args.month_to)
+
+    if not plan:
+        print("【エラー】発着信履歴_YYYYMMDD-YYYYMMDD.xlsx が見つかりません。")
+        input("Enterキーを押して終了してください...")
+        return
+
+    print(f"対象: {', '.join(month_label(m) for m in plan)}（ファイル {sum(len(p['files']) for p in plan.values())} 個）")
+
+    # 3. 月ごとに、前回から変わったファイルだけを読み込み対象にする
+    prepared = {}
+    for month, p in plan.items():
+        entries, to_parse, removed, old_order = prepare_month(month, p, args.full)
+        changed = bool(to_parse or removed) or not os.path.exists(os.path.join(p["dir"], OUTPUT_FILENAME))
+        # 前回と並べ方が違う（--no-sort を付けた・外した）ときも作り直す
+        changed |= (old_order is None) != args.no_sort
+        # データセットにまだ無い月も作り直す
+        changed |= bool(dataset_dir) and not call_dataset.has_month(dataset_dir, month)
+        prepared[month] = (entries, to_parse, removed, changed)
+
+    # 4. 全月の読み込み対象を1つのプロセスプールで読む
+    all_to_parse = [f for entries, to_parse, removed, changed in prepared.values() if changed for f in to_parse]
+    unique = len(set(all_to_parse))
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    workers = max(1, min(workers, unique))
+    loader = ExportLoader(all_to_parse, {f: e["sha256"] for v in prepared.values() for f, e in v[0].items()}, workers)
+
+    failed = []
+    try:
+        for month, p in plan.items():
+            entries, to_parse, removed, changed = prepared[month]
+            print(f"\n===== {month_label(month)}（{p['dir']}） =====")
+            print(f"対象ファイル数: {len(p['files'])} 個")
+            for file_path in removed:
+                print(f"・前回から削除されたファイル: {file_path}")
+            if not changed:
+                print("前回の統合から変更がないため、作成をスキップしました。")
+                continue
+            print(f"読み込み対象: {len(to_parse)} 個（残り {len(p['files']) - len(to_parse)} 個は前回の結果を使用）")
+            if not merge_month(month, p, entries, to_parse, loader, exports, args, dataset_dir):
+                failed.append(month)
+    finally:
+        loader.shutdown()
+
+    print("\n" + "="*30)
+    if failed:
+        print(f" 作成できなかった月: {', '.join(month_label(m) for m in failed)}")
+    else:
+        print(f" 完了！ 各月の 『{OUTPUT_FILENAME}』 が作成されました。")
+    print("="*30)
+
+    input("Enterキーを押して終了してください...")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+発着信履歴シートのレイアウト登録簿
+
+エクスポートのヘッダー行は時期によって崩れ方が違います（「発信者」が「不在」に
+なっている等）。ヘッダー行だけから指紋（fingerprint）を作り、登録済みの
+レイアウトと照らし合わせて、統合後の正しい列名に置き換えます。
+
+新しい崩れ方が見つかったら SHEET_LAYOUTS に1件追加してください。
+未登録のレイアウトでも捨てずに、列名で（ダメなら列の位置で）取り込みます。
+
+列の型（時刻・名前・電話番号・秒数）も COLUMN_TYPES で一度だけそろえます。
+集計側は xlsx_cache.read_excel(..., transform=apply_types) で読むと、
+型をそろえた結果がキャッシュに残り、2回目以降は型の推定もしません。
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# 統合後の列名（見本ファイルの並び）
+# ============================================================
+# 内線通話：元データの「着信番号」列は見本では「最終着信者名」になっている
+INTERNAL_HEADERS = [
+    '時刻', '発信番号', '発信者', '最終着信者名', '着信者', '最終着信番号', '最終着信者',
+    '通話時間（応答までの時間を含む）', '通話時間', 'メモ', 'リクエストID'
+]
+OUTBOUND_HEADERS = [
+    '時刻', '発信番号', '発信者', '着信番号', '最終着信番号',
+    '通話時間（応答までの時間を含む）', '通話時間', 'メモ', 'リクエストID'
+]
+INBOUND_HEADERS = [
+    '時刻', '発信番号', '着信番号', '着信者', '最終着信番号', '最終着信者',
+    '通話時間（応答までの時間を含む）', '通話時間', 'メモ', 'リクエストID'
+]
+
+# ============================================================
+# 登録済みレイアウト
+#   header : Excelから読んだままのヘッダー（pandas が付ける .1 などを含む）
+#   columns: 統合後の列名（header と同じ位置に対応）
+# ============================================================
+SHEET_LAYOUTS = [
+    {
+        "sheet": "内線通話", "version": "内線通話_標準",
+        "header": ['時刻', '発信番号', '発信者', '着信番号', '着信者', '最終着信番号', '最終着信者',
+                   '通話時間（応答までの時間を含む）', '通話時間', 'メモ', 'リクエストID'],
+        "columns": INTERNAL_HEADERS,
+    },
+    {
+        # 2025年11月など：名前の列のヘッダーが「不在」になっている
+        "sheet": "内線通話", "version": "内線通話_ヘッダー崩れ",
+        "header": ['時刻', '発信番号', '不在', '着信番号', '不在.1', '最終着信番号', '不在.2',
+                   '通話時間（応答までの時間を含む）', '通話時間', 'メモ', 'リクエストID'],
+        "columns": INTERNAL_HEADERS,
+    },
+    {
+        "sheet": "外線発信", "version": "外線発信_標準",
+        "header": OUTBOUND_HEADERS,
+        "columns": OUTBOUND_HEADERS,
+    },
+    {
+        # 「発信者」のヘッダーが「不在」になっている
+        "sheet": "外線発信", "version": "外線発信_ヘッダー崩れ",
+        "header": ['時刻', '発信番号', '不在', '着信番号', '最終着信番号',
+                   '通話時間（応答までの時間を含む）', '通話時間', 'メモ', 'リクエストID'],
+        "columns": OUTBOUND_HEADERS,
+    },
+    {
+        "sheet": "外線着信", "version": "外線着信_標準",
+        "header": INBOUND_HEADERS,
+        "columns": INBOUND_HEADERS,
+    },
+]
+
+# シートごとの「正しい列名」（未登録レイアウトを列名で取り込めるかの判定に使う）
+CANONICAL_COLUMNS = {
+    "内線通話": INTERNAL_HEADERS,
+    "外線発信": OUTBOUND_HEADERS,
+    "外線着信": INBOUND_HEADERS,
+}
+
+
+# ============================================================
+# 列の型（取り込み時に一度だけそろえる）
+#   datetime : 時刻（datetime64）
+#   category : 名前など同じ文字が何度も出てくる列（重複を除いた一覧 + 番号で持つ）
+#   phone    : 電話・内線番号（数字だけなら整数、それ以外があれば category）
+#   int32    : 秒数（空欄があれば欠損ありの Int32）
+# 型の決め方を変えたら TYPES_VERSION を上げる（キャッシュが作り直されます）
+# ============================================================
+TYPES_VERSION = 1
+
+COLUMN_TYPES = {
+    '時刻': 'datetime',
+    '発信者': 'category',
+    '着信者': 'category',
+    '最終着信者': 'category',
+    'メモ': 'category',
+    '発信番号': 'phone',
+    '着信番号': 'phone',
+    '最終着信番号': 'phone',
+    '最終着信者名': 'phone',  # 内線通話：元データの「着信番号」列
+    '通話時間（応答までの時間を含む）': 'int32',
+    '通話時間': 'int32',
+}
+
+
+# Int64 に入る範囲（これを超える桁の番号は文字列で持つ）
+_INT64_LIMIT = float(2 ** 63)
+
+
+def _to_phone(s):
+    """電話番号の列：すべて整数にでき Int64 の範囲に収まれば Int64、できなければ文字列の category"""
+    num = pd.to_numeric(s, errors='coerce')
+    valid = num.dropna()
+    if num.notna().sum() == s.notna().sum() and (valid % 1 == 0).all() and (valid.abs() < _INT64_LIMIT).all():
+        return num.astype('Int64')
+    text = s.map(lambda v: v if pd.isna(v) else str(int(v)) if isinstance(v, float) and v.is_integer() else str(v))
+    return text.astype('category')
+
+
+def _to_int32(s):
+    """秒数の列：int32（空欄があれば Int32）。小数が混ざっていればそのまま"""
+    num = pd.to_numeric(s, errors='coerce')
+    if not (num.dropna() % 1 == 0).all():
+        return num
+    return num.astype(np.int32) if num.notna().all() else num.astype('Int32')
+
+
+def apply_types(sheet_name, df):
+    """統合対象シートの列を COLUMN_TYPES の型にする（対象外のシート・列はそのまま）"""
+    if sheet_name not in CANONICAL_COLUMNS:
+        return df
+    df = df.copy(deep=False)
+    for col in df.columns:
+        kind = COLUMN_TYPES.get(col)
+        s = df[col]
+        if kind == 'datetime':
+            if s.dtype.kind != 'M':
+                df[col] = pd.to_datetime(s.astype(str).where(s.notna()), errors='coerce')
+        elif kind == 'category':
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                df[col] = s.astype(str).where(s.notna()).astype('category')
+        elif kind == 'phone':
+            df[col] = _to_phone(s)
+        elif kind == 'int32':
+            df[col] = _to_int32(s)
+    return df
+
+
+def concat(frames):
+    """型を保ったまま縦につなぐ（category の列は一覧を合わせてからつなぐ）
+
+    pd.concat は category の一覧が違うと文字列の列に戻してしまうため。
+    """
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    frames = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    frames = [f.copy(deep=False) for f in frames]
+    for col in frames[0].columns:
+        dtypes = [f[col].dtype for f in frames if col in f.columns]
+        if len(dtypes) == len(frames) and all(isinstance(t, pd.CategoricalDtype) for t in dtypes):
+            categories = pd.Index(sorted(set().union(*(t.categories for t in dtypes))), dtype=str)
+            for f in frames:
+                f[col] = f[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def fingerprint(sheet_name, header):
+    """シート名 + ヘッダー行の列名から指紋を作る（本体の行は使わない）"""
+    text = "\t".join([sheet_name] + [str(c).strip() for c in header])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+_REGISTRY = {fingerprint(l["sheet"], l["header"]): l for l in SHEET_LAYOUTS}
+
+
+def lookup(sheet_name, header):
+    """登録済みレイアウトを返す（無ければ None）"""
+    return _REGISTRY.get(fingerprint(sheet_name, header))
+
+
+def resolve(sheet_name, header):
+    """ヘッダー行から統合後の列名を決める
+
+    返り値は (列名のリスト, レイアウト名, 注意メッセージ or None)。
+    """
+    header = [str(c).strip() for c in header]
+    layout = lookup(sheet_name, header)
+    if layout:
+        return list(layout["columns"]), layout["version"], None
+
+    fp = fingerprint(sheet_name, header)
+    canonical = CANONICAL_COLUMNS.get(sheet_name, [])
+
+    # (1) 正しい列名がすべてそろっている → 列名のまま取り込む（並び替え・追加列はOK）
+    if all(c in header for c in canonical):
+        return header, f"未登録({fp})", f"未登録のレイアウト（指紋 {fp}）→ 列名で取り込みました"
+
+    # (2) 登録済みレイアウトの列がすべて含まれている（追加列がある等）→ その対応表で列名を置き換える
+    for l in SHEET_LAYOUTS:
+        if l["sheet"] == sheet_name and all(c in header for c in l["header"]):
+            rename = dict(zip(l["header"], l["columns"]))
+            return ([rename.get(c, c) for c in header], f"未登録({fp})",
+                    f"未登録のレイアウト（指紋 {fp}）→ 「{l['version']}」の列名で取り込みました（追加列はそのまま）")
+
+    # (3) 列数が同じ登録済みレイアウトがある → 位置で対応づける
+    for l in SHEET_LAYOUTS:
+        if l["sheet"] == sheet_name and len(l["header"]) == len(header):
+            return (list(l["columns"]), f"未登録({fp})",
+                    f"未登録のレイアウト（指紋 {fp}）→ 列の位置で「{l['version']}」として取り込みました")
+
+    # (4) どれにも当てはまらない → そのままの列名で取り込む
+    return header, f"未登録({fp})", f"未登録のレイアウト（指紋 {fp}）→ 列名を変えずに取り込みました。内容を確認してください"
+
+
+def read_headers(file_path, sheet_names=None):
+    """各シートのヘッダー行だけを読む（本体は読み込まない）"""
+    xls_data = pd.read_excel(file_path, sheet_name=sheet_names, nrows=0)
+    if not isinstance(xls_data, dict):
+        xls_data = {sheet_names: xls_data}
+    return {name: list(df.columns) for name, df in xls_data.items()}
@@ -0,0 +1,414 @@
+"""
+Excel読み込みキャッシュ（発着信履歴_*.xlsx / 発着信履歴_統合版.xlsx など）
+
+一度読み込んだシートを「ファイル内容のハッシュ」をキーにして、列ごとの
+NumPyバイナリ（.npy）で保存します。2回目以降は Excel を開かず、数値・日時の
+列はメモリマップで読み込むので、ほぼ一瞬で DataFrame が戻ります。
+列の型（int64 / float64 / datetime64 / 文字列 / category / 欠損ありの整数 など）は
+そのまま復元されます。
+
+transform= を渡すと、読み込んだ直後の DataFrame を変換（型をそろえる等）した
+結果をキャッシュします。2回目以降は変換済みのものがそのまま戻ります。
+loader= を渡すと、pd.read_excel の代わりにその関数でシートを読みます
+（見出し行を探しながら1回で読む、など）。
+
+キャッシュの場所は環境変数 XLSX_CACHE_DIR（既定: ~/.xlsx_cache）、
+上限は XLSX_CACHE_MAX_MB（既定: 2048MB）。上限を超えると、最後に使ってから
+一番時間が経ったファイルの分から消していきます。
+
+使い方（プログラムから）:
+    import xlsx_cache
+    sheets = xlsx_cache.read_excel("発着信履歴_20251201-20251203.xlsx", sheet_name=None)
+    df = xlsx_cache.read_excel("発着信履歴_統合版.xlsx", sheet_name="外線着信")
+    df = xlsx_cache.read_excel("発着信履歴_統合版.xlsx", sheet_name="外線着信",
+                               transform=sheet_schema.apply_types, transform_key="types1")
+
+使い方（コマンド）:
+    python xlsx_cache.py --info     キャッシュの場所と使用量を表示
+    python xlsx_cache.py --clear    キャッシュをすべて削除
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# 設定
+# ============================================================
+CACHE_DIR = os.environ.get("XLSX_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".xlsx_cache")
+MAX_CACHE_MB = int(os.environ.get("XLSX_CACHE_MAX_MB", "2048"))
+
+# 保存形式を変えたら上げる（古い形式のキャッシュは読まずに作り直す）
+FORMAT_VERSION = 1
+
+LAST_USED_FILE = ".last_used"
+
+
+# ============================================================
+# キーとパス
+# ============================================================
+def file_sha256(file_path):
+    """ファイル内容のハッシュ（同じ中身なら同じ値）"""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _entry_dir(sha):
+    return os.path.join(CACHE_DIR, sha)
+
+
+def _option_key(sheet_name, kwargs):
+    """シート名と読み込みオプション（header= など）からキーを作る"""
+    text = json.dumps([FORMAT_VERSION, sheet_name, sorted(kwargs.items())], ensure_ascii=False, default=str)
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def _func_name(func, key):
+    return key or f"{func.__module__}.{func.__qualname__}"
+
+
+def _key_kwargs(kwargs, transform, transform_key, loader=None, loader_key=None):
+    """キャッシュのキーに使う引数（変換・読み込み関数を使うときはその名前も含める）"""
+    if loader is not None:
+        kwargs = dict(kwargs, __loader__=_func_name(loader, loader_key))
+    if transform is not None:
+        kwargs = dict(kwargs, __transform__=_func_name(transform, transform_key))
+    return kwargs
+
+
+def _touch(sha):
+    """最後に使った時刻を記録（LRU削除の順番に使う）"""
+    try:
+        path = os.path.join(_entry_dir(sha), LAST_USED_FILE)
+        with open(path, "a"):
+            pass
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+# ============================================================
+# DataFrame ⇔ 列ごとの .npy
+# ============================================================
+def _is_plain_index(df):
+    return isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+
+
+def _can_store(df):
+    if not _is_plain_index(df) or isinstance(df.columns, pd.MultiIndex):
+        return False
+    # 列名はJSONに書ける str / int のみ対応
+    return all(isinstance(c, (str, int)) and not isinstance(c, bool) for c in df.columns)
+
+
+def _is_str_values(s):
+    values = s.dropna()
+    return values.map(type).eq(str).all() if len(values) else True
+
+
+def _save_frame(target_dir, df):
+    """1シート分を target_dir に保存する（途中で落ちても壊れないよう一時フォルダ経由）"""
+    tmp_dir = f"{target_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        s = df.iloc[:, i]
+        file_name = f"c{i:03d}.npy"
+        path = os.path.join(tmp_dir, file_name)
+        info = {"name": col, "file": file_name, "dtype": str(s.dtype)}
+
+        if s.dtype.kind == "M" and getattr(s.dtype, "tz", None) is None:
+            # 日時 → int64 で保存（読み込み時に datetime64 に戻す）
+            np.save(path, s.to_numpy().view("i8"))
+            info["kind"] = "datetime"
+        elif isinstance(s.dtype, np.dtype) and s.dtype.kind in "biuf":
+            np.save(path, s.to_numpy())
+            info["kind"] = "numpy"
+        elif isinstance(s.dtype, pd.api.extensions.ExtensionDtype) and s.dtype.kind in "iu":
+            # 欠損ありの整数（Int64 / Int32 など）→ 値と欠損の目印を別々に保存
+            np.save(path, s.to_numpy(dtype=s.dtype.numpy_dtype, na_value=0))
+            info["mask"] = f"c{i:03d}_mask.npy"
+            np.save(os.path.join(tmp_dir, info["mask"]), s.isna().to_numpy())
+            info["kind"] = "masked"
+        elif (pd.api.types.is_string_dtype(s.dtype) or isinstance(s.dtype, pd.CategoricalDtype)) and _is_str_values(s):
+            # 文字列 → 重複を除いた一覧 + 番号（int32）で保存
+            cat = pd.Categorical(s)
+            np.save(path, cat.codes.astype(np.int32))
+            info["kind"] = "category" if isinstance(s.dtype, pd.CategoricalDtype) else "string"
+            info["categories"] = [str(c) for c in cat.categories]
+        else:
+            # 混在した列など（例: 桁の大きいリクエストID）は Series ごと保存
+            file_name = f"c{i:03d}.pkl"
+            pd.to_pickle(s, os.path.join(tmp_dir, file_name))
+            info["file"] = file_name
+            info["kind"] = "pickle"
+        columns.append(info)
+
+    meta = {"version": FORMAT_VERSION, "rows": len(df), "columns": columns}
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    try:
+        os.rename(tmp_dir, target_dir)
+    except OSError:
+        # 別プロセスが先に保存した場合など
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _load_frame(target_dir):
+    with open(os.path.join(target_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError("キャッシュの形式が古い")
+
+    data = {}
+    for i, info in enumerate(meta["columns"]):
+        path = os.path.join(target_dir, info["file"])
+        kind = info["kind"]
+        if kind == "pickle":
+            data[i] = pd.read_pickle(path).reset_index(drop=True)
+            continue
+
+        # "c" = コピーオンライト：ファイルは書き換えず、DataFrame側での変更もできる
+        arr = np.asarray(np.load(path, mmap_mode="c"))
+        if kind == "datetime":
+            data[i] = arr.view(info["dtype"])
+        elif kind == "numpy":
+            data[i] = arr
+        elif kind == "masked":
+            mask = np.asarray(np.load(os.path.join(target_dir, info["mask"]), mmap_mode="c"))
+            data[i] = pd.array(arr, dtype=info["dtype"])
+            data[i][mask] = pd.NA
+        else:
+            cat = pd.Categorical.from_codes(arr, categories=pd.Index(info["categories"], dtype=str))
+            data[i] = cat if kind == "category" else pd.Series(cat).astype(info["dtype"])
+
+    if not data:
+        return pd.DataFrame(index=pd.RangeIndex(meta["rows"]))
+    df = pd.DataFrame(data, copy=False)
+    df.columns = [info["name"] for info in meta["columns"]]
+    return df
+
+
+def _write_json(path, obj):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# 公開関数
+# ============================================================
+def is_cached(file_path, sheet_name=0, sha=None, transform=None, transform_key=None,
+              loader=None, loader_key=None, **kwargs):
+    """read_excel を同じ引数で呼んだとき、Excelを開かずに済むか"""
+    sha = sha or file_sha256(file_path)
+    kwargs = _key_kwargs(kwargs, transform, transform_key, loader, loader_key)
+    entry = _entry_dir(sha)
+    if sheet_name is None:
+        names_file = os.path.join(entry, _option_key(None, kwargs) + ".json")
+        if not os.path.exists(names_file):
+            return False
+        with open(names_file, encoding="utf-8") as f:
+            names = json.load(f)
+        return all(os.path.isdir(os.path.join(entry, _option_key(n, kwargs))) for n in names)
+    return os.path.isdir(os.path.join(entry, _option_key(sheet_name, kwargs)))
+
+
+def read_excel(file_path, sheet_name=0, sha=None, transform=None, transform_key=None,
+               loader=None, loader_key=None, **kwargs):
+    """pd.read_excel と同じ使い方で、2回目以降はキャッシュから読む
+
+    sheet_name=None なら {シート名: DataFrame}、それ以外は DataFrame を返す。
+    sha にファイルのハッシュを渡すと、ハッシュ計算を省略します。
+    transform(シート名, DataFrame) を渡すと、変換後の DataFrame をキャッシュします。
+    変換の中身を変えたときは transform_key（版など）も変えてください。
+    loader(パス, sheet_name=..., **kwargs) を渡すと、pd.read_excel の代わりに使います
+    （読み方を変えたときは loader_key も変えてください）。
+    """
+    sha = sha or file_sha256(file_path)
+    entry = _entry_dir(sha)
+    raw_kwargs = kwargs
+    kwargs = _key_kwargs(kwargs, transform, transform_key, loader, loader_key)
+
+    # --- キャッシュから読む ---
+    try:
+        if sheet_name is None:
+            with open(os.path.join(entry, _option_key(None, kwargs) + ".json"), encoding="utf-8") as f:
+                names = json.load(f)
+            result = {n: _load_frame(os.path.join(entry, _option_key(n, kwargs))) for n in names}
+        else:
+            result = _load_frame(os.path.join(entry, _option_key(sheet_name, kwargs)))
+        _touch(sha)
+        return result
+    except (OSError, ValueError, KeyError):
+        pass
+
+    # --- 無ければ Excel を読んで（変換するときは変換前のキャッシュを使って）保存 ---
+    if transform is None:
+        result = (loader or pd.read_excel)(file_path, sheet_name=sheet_name, **raw_kwargs)
+    else:
+        result = read_excel(file_path, sheet_name=sheet_name, sha=sha,
+                            loader=loader, loader_key=loader_key, **raw_kwargs)
+        if sheet_name is None:
+            result = {n: transform(n, df) for n, df in result.items()}
+        else:
+            result = transform(sheet_name, result)
+    frames = result if sheet_name is None else {sheet_name: result}
+    if all(_can_store(df) for df in frames.values()):
+        try:
+            os.makedirs(entry, exist_ok=True)
+            saved = 0
+            for name, df in frames.items():
+                target = os.path.join(entry, _option_key(name, kwargs))
+                if not os.path.isdir(target):
+                    _save_frame(target, df)
+                    saved += _dir_size(target)
+            if sheet_name is None:
+                _write_json(os.path.join(entry, _option_key(None, kwargs) + ".json"), list(frames))
+            _touch(sha)
+            _add_size(saved)
+        except OSError as e:
+            # キャッシュは保存できなくても読み込み結果はそのまま返す
+            print(f"  [!] キャッシュを保存できませんでした: {e}")
+    return result
+
+
+def save_frame(target_dir, df):
+    """DataFrame をキャッシュと同じ形式（列ごとの .npy）で target_dir に保存する"""
+    _save_frame(target_dir, df.reset_index(drop=True))
+
+
+def load_frame(target_dir):
+    """save_frame で保存したものを読む"""
+    return _load_frame(target_dir)
+
+
+def sheet_names(file_path, sha=None):
+    """シート名の一覧（2回目以降は Excel を開かない）"""
+    sha = sha or file_sha256(file_path)
+    names_file = os.path.join(_entry_dir(sha), _option_key("__sheet_names__", {}) + ".json")
+    try:
+        with open(names_file, encoding="utf-8") as f:
+            names = json.load(f)
+        _touch(sha)
+        return names
+    except (OSError, ValueError):
+        pass
+
+    names = pd.ExcelFile(file_path).sheet_names
+    try:
+        os.makedirs(_entry_dir(sha), exist_ok=True)
+        _write_json(names_file, names)
+        _touch(sha)
+    except OSError:
+        pass
+    return names
+
+
+# ============================================================
+# 容量管理
+# ============================================================
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _entries():
+    """[(最終使用時刻, サイズ, フォルダ)] を古い順に返す"""
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    result = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if not os.path.isdir(path):
+            continue
+        try:
+            last_used = os.path.getmtime(os.path.join(path, LAST_USED_FILE))
+        except OSError:
+            last_used = 0
+        result.append((last_used, _dir_size(path), path))
+    return sorted(result)
+
+
+# このプロセスから見たキャッシュの合計サイズ（最初の保存で1回だけフォルダ全体を数え、あとは保存した分を足す）
+_total_bytes = None
+
+
+def _add_size(nbytes):
+    """保存した分を合計に足し、上限を超えたときだけ evict する（保存のたびにフォルダ全体は数えない）"""
+    global _total_bytes
+    if _total_bytes is None:
+        _total_bytes = sum(size for _, size, _ in _entries())
+    else:
+        _total_bytes += nbytes
+    if _total_bytes > MAX_CACHE_MB * 1024 * 1024:
+        evict()
+
+
+def evict(max_mb=None):
+    """上限を超えていたら、最後に使ってから時間が経ったものから削除する"""
+    global _total_bytes
+    limit = (MAX_CACHE_MB if max_mb is None else max_mb) * 1024 * 1024
+    entries = _entries()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in entries:
+        if total <= limit:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    _total_bytes = total
+    return removed
+
+
+def clear():
+    """キャッシュをすべて削除する"""
+    global _total_bytes
+    count = len(_entries())
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    _total_bytes = None
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel読み込みキャッシュの管理")
+    parser.add_argument("--clear", action="store_true", help="キャッシュをすべて削除")
+    parser.add_argument("--info", action="store_true", help="キャッシュの場所と使用量を表示")
+    args = parser.parse_args()
+
+    if args.clear:
+        count = clear()
+        print(f"キャッシュを削除しました（{count} ファイル分）: {CACHE_DIR}")
+        return
+
+    entries = _entries()
+    total_mb = sum(size for _, size, _ in entries) / 1024 / 1024
+    print(f"場所: {CACHE_DIR}")
+    print(f"件数: {len(entries)} ファイル分 / 使用量: {total_mb:.1f}MB（上限 {MAX_CACHE_MB}MB）")
+    if entries:
+        newest = time.strftime("%Y-%m-%d %H:%M", time.localtime(entries[-1][0]))
+        print(f"最終使用: {newest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+通話の時間の重なり・時間帯の分析（analyze_logs 用）
+
+行ごとの Python のループは使わず、時刻を整数（秒）にして
+並べ替え・累積和・bincount でまとめて計算します（1年分でも数秒）。
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+import call_features
+
+# 区間の長さ（秒）の既定値 = 15分
+INTERVAL_SECONDS = 15 * 60
+
+
+def _normalize_number(value):
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    digits = re.sub(r'\D', '', str(value)).lstrip('0')
+    return digits or None
+
+
+def normalize_number(s):
+    """電話番号の列をそろえる（数字だけにして先頭の0を外す。数字のない「非通知」などは空欄）
+
+    取り込み時に整数になった番号（090… → 90…）と文字列のままの番号を同じ値にするため、先頭の0は外す。
+    """
+    return pd.Series(call_features.map_unique(s, _normalize_number), index=s.index, dtype=object)
+
+
+def to_seconds(dt):
+    """日時の列 → 1970-01-01 からの秒数（int64）と、日時が空でないかのフラグ"""
+    dt = pd.to_datetime(dt, errors='coerce')
+    valid = dt.notna().to_numpy()
+    sec = np.zeros(len(dt), dtype=np.int64)
+    sec[valid] = dt[valid].to_numpy().astype('datetime64[s]').astype(np.int64)
+    return sec, valid
+
+
+def _group_ids(keys, valid):
+    """keys の列の組み合わせごとの番号（valid な行だけ）と、番号 → 組み合わせの表"""
+    keys = pd.DataFrame(keys).reset_index(drop=True)
+    valid = valid & keys.notna().all(axis=1).to_numpy()
+    keys = keys[valid]
+    grouped = keys.groupby(list(keys.columns), sort=True, observed=True)
+    labels = grouped.size().index.to_frame(index=False)
+    return grouped.ngroup().to_numpy(), labels, valid
+
+
+def concurrency(start, duration, keys, interval=INTERVAL_SECONDS):
+    """同時通話数（重なっている通話の数）を keys ごと・区間ごとに求める（スイープライン）
+
+    start: 通話の開始日時、duration: 通話の長さ（秒）、keys: 集計の単位の列（拠点・名前など）。
+    通話を区間の境目で切ってから、開始 +1 / 終了 -1 のイベントを (単位, 区間, 時刻) で並べて累積和をとる。
+    同じ時刻に終わる通話と始まる通話は重ねない（終了を先に数える）。
+    戻り値: keys の列 + interval_start（区間の開始日時）+ peak（区間内の最大）+ average（区間の平均）
+    """
+    sec, valid = to_seconds(start)
+    dur = np.ceil(pd.to_numeric(pd.Series(duration), errors='coerce').to_numpy(dtype=float))
+    valid = valid & (np.nan_to_num(dur, nan=0) > 0)
+    gid, labels, valid = _group_ids(keys, valid)
+    out_cols = list(labels.columns) + ['interval_start', 'peak', 'average']
+    if not valid.any():
+        return pd.DataFrame(columns=out_cols)
+    s = sec[valid]
+    e = s + dur[valid].astype(np.int64)
+
+    # 区間の境目で切る（ほとんどの通話は1〜2区間）
+    k0 = s // interval
+    pieces = (e - 1) // interval - k0 + 1
+    row = np.repeat(np.arange(len(s)), pieces)
+    k = k0[row] + np.arange(len(row)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    ps = np.maximum(s[row], k * interval)
+    pe = np.minimum(e[row], (k + 1) * interval)
+
+    # (単位, 区間) ごとに +1 と -1 が同数なので、全体の累積和がそのまま区間内の同時通話数になる
+    k_min = k.min()
+    span = k.max() - k_min + 1
+    key = gid[row] * span + (k - k_min)
+    ev_key = np.concatenate([key, key])
+    ev_time = np.concatenate([ps, pe])
+    ev_delta = np.concatenate([np.ones(len(ps), dtype=np.int64), -np.ones(len(pe), dtype=np.int64)])
+    order = np.lexsort((ev_delta, ev_time, ev_key))
+    level = np.cumsum(ev_delta[order])
+    sorted_key = ev_key[order]
+    ukey, first = np.unique(sorted_key, return_index=True)
+    peak = np.maximum.reduceat(level, first)
+    busy = np.bincount(np.searchsorted(ukey, key), weights=pe - ps, minlength=len(ukey))
+
+    result = labels.iloc[ukey // span].reset_index(drop=True)
+    result['interval_start'] = pd.to_datetime((ukey % span + k_min) * interval, unit='s')
+    result['peak'] = peak
+    result['average'] = busy / interval
+    return result[out_cols]
+
+
+def slot_counts(start, keys, flags=None, interval=INTERVAL_SECONDS):
+    """keys ごと・曜日ごと・時間帯（interval 秒ごと）ごとの件数（整数にして bincount で一度に数える）
+
+    flags に {列名: 真偽の配列} を渡すと、そのうち True の行の件数も列にする（着電数など）。
+    戻り値: keys の列 + weekday（0=月曜）+ slot_start（0時からの秒）+ count + flags の列。
+    件数が0の組み合わせも含めて全部の行を返す（keys の種類 × 7 × 1日の区間数）。
+    """
+    flags = flags or {}
+    sec, valid = to_seconds(start)
+    gid, labels, valid = _group_ids(keys, valid)
+    out_cols = list(labels.columns) + ['weekday', 'slot_start', 'count'] + list(flags)
+    if not valid.any():
+        return pd.DataFrame(columns=out_cols)
+    s = sec[valid]
+    slots = -(-86400 // interval)
+    weekday = (s // 86400 + 3) % 7  # 1970-01-01 は木曜
+    cell = (gid * 7 + weekday) * slots + (s % 86400) // interval
+    size = len(labels) * 7 * slots
+
+    result = labels.iloc[np.repeat(np.arange(len(labels)), 7 * slots)].reset_index(drop=True)
+    result['weekday'] = np.tile(np.repeat(np.arange(7), slots), len(labels))
+    result['slot_start'] = np.tile(np.arange(slots) * interval, 7 * len(labels))
+    result['count'] = np.bincount(cell, minlength=size)
+    for name, flag in flags.items():
+        result[name] = np.bincount(cell, weights=np.asarray(flag, dtype=bool)[valid], minlength=size).astype(np.int64)
+    return result[out_cols]
+
+
+def match_callbacks(missed_time, missed_number, out_time, out_number, window):
+    """不在の着信ごとに、同じ番号へのその後最初の発信（window 以内）を探す（番号ごとの merge_asof）
+
+    missed_* は不在の着信の時刻と相手の番号、out_* は発信の時刻とかけた先の番号（normalize_number 済み）。
+    戻り値: missed と同じ index で callback_at（折り返した時刻）・callback_row（out の何行目か。なければ -1）・
+    delay（折り返すまでの秒数。なければ NaN）
+    """
+    left = pd.DataFrame({'t': pd.to_datetime(missed_time, errors='coerce').to_numpy().astype('datetime64[ns]'),
+                         'number': np.asarray(missed_number, dtype=object), 'row': np.arange(len(missed_time))})
+    right = pd.DataFrame({'callback_at': pd.to_datetime(out_time, errors='coerce').to_numpy().astype('datetime64[ns]'),
+                          'number': np.asarray(out_number, dtype=object), 'callback_row': np.arange(len(out_time))})
+    left = left.dropna().sort_values('t', kind='stable')
+    right = right.dropna().sort_values('callback_at', kind='stable')
+    matched = pd.merge_asof(left, right, left_on='t', right_on='callback_at', by='number',
+                            direction='forward', tolerance=pd.Timedelta(window))
+
+    result = pd.DataFrame({'callback_at': pd.NaT, 'callback_row': -1, 'delay': np.nan},
+                          index=pd.RangeIndex(len(missed_time)))
+    result['callback_at'] = result['callback_at'].astype('datetime64[ns]')
+    found = matched[matched['callback_at'].notna()]
+    rows = found['row'].to_numpy()
+    result.loc[rows, 'callback_at'] = found['callback_at'].to_numpy()
+    result.loc[rows, 'callback_row'] = found['callback_row'].to_numpy().astype(np.int64)
+    result.loc[rows, 'delay'] = (found['callback_at'] - found['t']).dt.total_seconds().to_numpy()
+    result.index = missed_time.index if isinstance(missed_time, pd.Series) else result.index
+    return result
+
+
+def repeat_calls(start, number, window, answered=None):
+    """同じ番号からの繰り返しの着信をまとめる（番号・時刻で並べ、隣どうしの差と searchsorted の二点走査で数える）
+
+    前の着信から window 秒以内にかけ直した着信は同じ「問い合わせ」（episode）とみなす。
+    answered（着電したか）を渡すと、着電した着信でその問い合わせは終わり、その後のかけ直しは新しい問い合わせにする。
+    戻り値: start と同じ index で episode（問い合わせの番号。番号・時刻が空の行は -1）・
+    attempt（その問い合わせの何回目か）・in_window（直前 window 秒以内の同じ番号からの着信数。自分を含む）
+    """
+    sec, valid = to_seconds(start)
+    number = np.asarray(number, dtype=object)
+    valid = valid & pd.notna(number)
+    n = len(sec)
+    episode = np.full(n, -1, dtype=np.int64)
+    attempt = np.zeros(n, dtype=np.int64)
+    in_window = np.zeros(n, dtype=np.int64)
+    rows = np.flatnonzero(valid)
+    if len(rows):
+        codes, _ = pd.factorize(number[rows])
+        order = np.lexsort((sec[rows], codes))
+        rows = rows[order]
+        c = codes[order].astype(np.int64)
+        t = sec[rows] - sec[rows].min()
+
+        new = np.ones(len(rows), dtype=bool)
+        new[1:] = (c[1:] != c[:-1]) | (t[1:] - t[:-1] > window)
+        if answered is not None:
+            new[1:] |= np.asarray(answered, dtype=bool)[rows][:-1]
+        ep = np.cumsum(new) - 1
+        pos = np.arange(len(rows))
+        episode[rows] = ep
+        attempt[rows] = pos - np.flatnonzero(new)[ep] + 1
+        # 番号ごとに時刻の区切りが重ならないよう1つの数にして、window 秒前の位置を二分探索する
+        key = c * (t.max() + window + 1) + t
+        in_window[rows] = pos - np.searchsorted(key, key - window, side='left') + 1
+
+    index = start.index if isinstance(start, pd.Series) else pd.RangeIndex(n)
+    return pd.DataFrame({'episode': episode, 'attempt': attempt, 'in_window': in_window}, index=index)
+
+
+def repeat_episodes(calls):
+    """repeat_calls の列（episode・attempt）を足した着信の表 → 問い合わせごとの表
+
+    拠点（target_base）と1回目で出られたか（first_answered）は1回目（attempt == 1）の行から取るので、
+    行が時刻順に並んでいなくても同じ結果になる。ほかに any_answered（最終的に出られたか）・attempts（回数）。
+    """
+    first = calls[calls['attempt'] == 1].set_index('episode')
+    grouped = calls.groupby('episode')
+    return pd.DataFrame({'target_base': first['target_base'], 'first_answered': first['answered'].astype(bool),
+                         'any_answered': grouped['answered'].any(), 'attempts': grouped['attempt'].max()}).sort_index()
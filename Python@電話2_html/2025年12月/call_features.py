@@ -0,0 +1,112 @@
+"""
+発着信履歴の列から集計用の列を作る（analyze_logs / generate_report 共通）
+
+「【東京】高澤早紀」のような文字列は行数が多くても種類は数百しかないため、
+種類ごとに1回だけ解析して、結果を行に配ります（category の列で返します）。
+"""
+
+import numpy as np
+import pandas as pd
+
+# (解析関数, 値) → 解析結果。シートや列をまたいで使い回す
+_PARSE_CACHE = {}
+
+
+def _parse(parse, value):
+    key = (parse, value)
+    if key not in _PARSE_CACHE:
+        _PARSE_CACHE[key] = parse(value)
+    return _PARSE_CACHE[key]
+
+
+def _unique_codes(s):
+    """(重複を除いた値の一覧, 行ごとの番号)。一覧の最後は空欄の行の分"""
+    cat = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype(object).astype('category')
+    values = list(cat.cat.categories) + [np.nan]
+    codes = cat.cat.codes.to_numpy().astype(np.intp)
+    codes[codes < 0] = len(values) - 1
+    return values, codes
+
+
+def map_unique(s, func):
+    """func を重複を除いた値ごとに1回だけ呼び、行ごとの結果を配列で返す（判定フラグなど）"""
+    values, codes = _unique_codes(s)
+    results = np.array([_parse(func, v) for v in values])
+    return results[codes]
+
+
+def _from_unique(results, codes):
+    """種類ごとの結果（最後の要素は空欄の行の分）を行に配って category の列にする"""
+    res_codes, uniques = pd.factorize(pd.Series(results, dtype=object), use_na_sentinel=True)
+    row_codes = res_codes[codes]
+    return pd.Categorical.from_codes(row_codes, categories=pd.Index(uniques, dtype=object).astype(str))
+
+
+def split_caller(s, parse):
+    """「【拠点】名前」の列を (拠点, 名前) の2列にする
+
+    parse(値) は (拠点, 名前) を返す関数（各スクリプトの extract_base_name など）。
+    重複を除いた値ごとに1回だけ呼び、結果は category の Series で返す。
+    """
+    values, codes = _unique_codes(s)
+    pairs = [_parse(parse, v) for v in values]
+    base = _from_unique([p[0] for p in pairs], codes)
+    name = _from_unique([p[1] for p in pairs], codes)
+    return pd.Series(base, index=s.index), pd.Series(name, index=s.index)
+
+
+# ============================================================
+# 営業時間の判定（時刻を「0時からの秒数」の整数にして比べる）
+# ============================================================
+def time_to_seconds(t):
+    """datetime.time → 0時からの秒数"""
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def seconds_of_day(dt):
+    """日時の列 → 0時からの秒数（int32）。時刻が空の行は -1"""
+    dt = pd.to_datetime(dt, errors='coerce')
+    sec = dt.dt.hour * 3600 + dt.dt.minute * 60 + dt.dt.second
+    return sec.fillna(-1).astype(np.int32)
+
+
+def _hours_array(table, keys, start, end):
+    """{キー: (開始, 終了) or None(休み)} → キーの並びに対応する (開始秒, 終了秒) の配列"""
+    starts = np.full(len(keys), time_to_seconds(start), dtype=np.int32)
+    ends = np.full(len(keys), time_to_seconds(end), dtype=np.int32)
+    for i, key in enumerate(keys):
+        if key in table:
+            hours = table[key]
+            starts[i], ends[i] = (time_to_seconds(hours[0]), time_to_seconds(hours[1])) if hours else (-1, -2)
+    return starts, ends
+
+
+def business_hours_mask(dt, start, end, include_end=True, by_weekday=None, by_base=None, base=None):
+    """営業時間内の行なら True の配列を返す（時刻が空の行は False）
+
+    start / end      : 既定の営業時間（datetime.time）
+    include_end      : True なら end ちょうど（17:45:00）も時間内
+    by_weekday       : {曜日(0=月 … 6=日): (開始, 終了) or None(休み)} … 曜日で時間が違う場合
+    by_base, base    : {拠点: (開始, 終了) or None} と行ごとの拠点の列 … 拠点で時間が違う場合
+                       （拠点の表は曜日の表より優先）
+    """
+    dt = pd.to_datetime(dt, errors='coerce')
+    sec = seconds_of_day(dt).to_numpy()
+    n = len(sec)
+    starts = np.full(n, time_to_seconds(start), dtype=np.int32)
+    ends = np.full(n, time_to_seconds(end), dtype=np.int32)
+
+    if by_weekday:
+        day_starts, day_ends = _hours_array(by_weekday, range(7), start, end)
+        weekday = dt.dt.weekday.fillna(0).astype(np.intp).to_numpy()
+        starts, ends = day_starts[weekday], day_ends[weekday]
+
+    if by_base and base is not None:
+        values, codes = _unique_codes(base)
+        base_starts, base_ends = _hours_array(by_base, values, start, end)
+        hit = np.array([v in by_base for v in values])[codes]
+        starts = np.where(hit, base_starts[codes], starts)
+        ends = np.where(hit, base_ends[codes], ends)
+
+    inside = (sec >= starts) & ((sec <= ends) if include_end else (sec < ends))
+    return inside & (sec >= 0)
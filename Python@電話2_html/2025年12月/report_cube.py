@@ -0,0 +1,236 @@
+"""
+集計キューブ（analyze_logs 用）
+
+内線・外線の行を
+  channel × target_base × final_base × final_name × date × in_biz × answered
+ごとに1回の groupby で「件数・通話時間の合計」にまとめておき、
+各シートの数字はこの小さな表を絞り込んで足し合わせて作ります。
+（シートごとに元の表を絞り込み直さないので速く、シート間の合計も必ずそろう）
+
+キューブは日付も軸に持つので、1日分ずつに分けて保存しておけば（DayStore）、
+次回は中身の変わった日だけを集計し直し、残りは保存済みの分をつなぐだけで済みます。
+期間を指定すれば、週次・直近N日などの集計も保存済みの日をつなぐだけで作れます。
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['channel', 'target_base', 'final_base', 'final_name', 'date', 'in_biz', 'answered']
+CHANNELS = ['内線', '外線']
+
+# 日別の部分集計の保存形式を変えたら上げる（古い保存分は使わずに作り直す）
+STORE_VERSION = 1
+STORE_INDEX = 'index.json'
+
+
+def _frame_dims(df, channel):
+    """1つの表から、キューブの軸になる列だけを取り出す（無い列は空欄 / False）"""
+    n = len(df)
+    dims = pd.DataFrame(index=df.index)
+    dims['channel'] = channel
+    for col in ['target_base', 'final_base', 'final_name', 'date']:
+        dims[col] = df[col] if col in df.columns else None
+    for col in ['in_biz', 'answered']:
+        dims[col] = df[col].to_numpy(dtype=bool) if col in df.columns else np.zeros(n, dtype=bool)
+    dims['talk'] = pd.to_numeric(df['通話時間'], errors='coerce') if '通話時間' in df.columns else np.nan
+    return dims
+
+
+def build(frames):
+    """{channel: 表} → キューブ（DIMENSIONS の列 + count / talk_sum）
+
+    空欄（拠点なし・時刻なし など）も1つの値として残すので、count の合計は元の行数と一致する。
+    """
+    parts = []
+    for channel, df in frames.items():
+        if df is None or df.empty:
+            continue
+        grouped = _frame_dims(df, channel).groupby(DIMENSIONS, observed=True, dropna=False, sort=False)
+        parts.append(grouped['talk'].agg(count='size', talk_sum='sum').reset_index())
+    if not parts:
+        return pd.DataFrame({**{c: [] for c in DIMENSIONS}, 'count': [], 'talk_sum': []})
+    cube = pd.concat(parts, ignore_index=True)
+    for col in ['target_base', 'final_base', 'final_name']:
+        cube[col] = cube[col].astype(object)
+    return cube
+
+
+def select(cube, **where):
+    """列=値 で絞り込んだキューブ（例: select(cube, channel='外線', in_biz=True)）"""
+    mask = np.ones(len(cube), dtype=bool)
+    for col, value in where.items():
+        mask &= (cube[col] == value).to_numpy()
+    return cube[mask]
+
+
+def counts(cube, by, **where):
+    """絞り込んだ上で by ごとの件数（空欄の by は数えない。value_counts と同じ）"""
+    part = select(cube, **where)
+    return part.groupby(by)['count'].sum()
+
+
+def total(cube, **where):
+    """絞り込んだ上での件数の合計"""
+    return int(select(cube, **where)['count'].sum())
+
+
+def between(cube, start=None, end=None):
+    """date が start〜end（両端を含む）の行だけにする。期間を指定すると日付が空の行は除く"""
+    if start is None and end is None:
+        return cube
+    dates = pd.to_datetime(cube['date'], errors='coerce')
+    mask = dates.notna()
+    if start is not None:
+        mask = mask & (dates >= pd.Timestamp(start))
+    if end is not None:
+        mask = mask & (dates <= pd.Timestamp(end))
+    return cube[mask.to_numpy()]
+
+
+# ============================================================
+# 日別の部分集計
+# ============================================================
+def day_key(channel, day):
+    """保存用のキー（日付が空の行は none）"""
+    return f"{channel}_{day.isoformat() if day is not None else 'none'}"
+
+
+def _row_dates(df):
+    """行ごとの日付（datetime.date、時刻が空なら None）"""
+    if '時刻' not in df.columns:
+        return pd.Series(None, index=df.index, dtype=object)
+    dates = pd.to_datetime(df['時刻'], errors='coerce').dt.date
+    return dates.astype(object).where(dates.notna(), None)
+
+
+def day_fingerprints(df, dates):
+    """日ごとの中身の指紋 {日付: 文字列}（行の値のハッシュの和＋行数＋列名。行の並びには左右されない）"""
+    if df.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    columns = pd.util.hash_array(np.array([str(c) for c in df.columns], dtype=object)).sum(dtype=np.uint64)
+    codes, days = pd.factorize(dates, use_na_sentinel=False)
+    sums = np.zeros(len(days), dtype=np.uint64)
+    np.add.at(sums, codes, hashes)
+    counts = np.bincount(codes, minlength=len(days))
+    return {(None if pd.isna(day) else day): f"{s:016x}-{n}-{columns:016x}"
+            for day, s, n in zip(days, sums, counts)}
+
+
+class DayStore:
+    """日別の部分集計（キューブの1日分）をフォルダに保存しておく
+
+    config には集計結果を変える設定（営業時間・除外キーワードなど）を文字列で渡す。
+    前回と違えば保存分はすべて使わずに作り直す。
+    """
+
+    def __init__(self, path, config=""):
+        self.path = path
+        self.config = f"{STORE_VERSION}:{config}"
+        self.index = {"config": self.config, "days": {}}
+        try:
+            with open(os.path.join(path, STORE_INDEX), encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get("config") == self.config:
+                self.index = index
+        except (OSError, ValueError):
+            pass
+
+    def fingerprint(self, key):
+        return self.index["days"].get(key, {}).get("fp")
+
+    def keys(self, start=None, end=None):
+        """保存済みのキー（start/end を指定するとその期間の日だけ。日付が空の分は含めない）"""
+        for key, info in self.index["days"].items():
+            day = info.get("date")
+            if start is None and end is None:
+                yield key
+            elif day is not None and (start is None or day >= start.isoformat()) and (end is None or day <= end.isoformat()):
+                yield key
+
+    def load(self, key):
+        """保存済みの部分集計（読めなければ None → 作り直す）"""
+        try:
+            return pd.read_pickle(os.path.join(self.path, key + '.pkl'))
+        except Exception:
+            return None
+
+    def save(self, key, day, part, fp):
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, key + '.pkl')
+        tmp = f"{path}.tmp{os.getpid()}"
+        part.reset_index(drop=True).to_pickle(tmp)
+        os.replace(tmp, path)
+        self.index["days"][key] = {"date": day.isoformat() if day is not None else None,
+                                   "fp": fp, "rows": int(part['count'].sum())}
+
+    def commit(self):
+        """索引を書く（部分集計を保存し終わってから呼ぶ）"""
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, STORE_INDEX)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+
+def build_incremental(frames, prepare, store=None, start=None, end=None):
+    """{channel: 読み込んだままの表} → キューブ（日別の部分集計をつないで作る）
+
+    prepare(表) は集計用の列（target_base / answered / in_biz など）を足して返す関数。
+    store があれば、前回と中身が同じ日は保存済みの部分集計を使い、変わった日の行だけ prepare → 集計する。
+    start/end を指定すると、その期間の日（今回の入力に無い保存済みの日も含む）をつなぐ。
+    未指定なら今回の入力にある日（時刻が空の行の分も含む）。
+    部分集計は日ごとに軸の値が重ならないので、つなぐだけで1回で集計したのと同じキューブになる。
+    戻り値は (キューブ, 集計し直した日数, 保存分を使った日数)。
+    """
+    partials = {}
+    rebuilt = reused = 0
+    for channel, df in frames.items():
+        if df is None or df.empty:
+            continue
+        dates = _row_dates(df)
+        fps = day_fingerprints(df, dates)
+        changed = []
+        for day, fp in fps.items():
+            key = day_key(channel, day)
+            part = store.load(key) if store is not None and store.fingerprint(key) == fp else None
+            if part is None:
+                changed.append(day)
+            else:
+                partials[key] = part
+                reused += 1
+        if changed:
+            mask = dates.isin([d for d in changed if d is not None]).to_numpy()
+            if None in changed:
+                mask = mask | dates.isna().to_numpy()
+            cube = build({channel: prepare(df[mask].copy())})
+            cube_days = _row_dates_of_cube(cube)
+            for day in changed:
+                part = cube[(cube_days == day_key(channel, day)).to_numpy()]
+                partials[day_key(channel, day)] = part
+                if store is not None:
+                    store.save(day_key(channel, day), day, part, fps[day])
+            rebuilt += len(changed)
+
+    if start is None and end is None:
+        keys = list(partials)
+    else:
+        keys = list(store.keys(start, end)) if store is not None else list(partials)
+        for key in keys:
+            if key not in partials:
+                partials[key] = store.load(key)
+    if store is not None:
+        store.commit()
+    parts = [partials[k] for k in keys if partials[k] is not None and len(partials[k])]
+    cube = pd.concat(parts, ignore_index=True) if parts else build({})
+    return between(cube, start, end), rebuilt, reused
+
+
+def _row_dates_of_cube(cube):
+    """キューブの行ごとの保存キー"""
+    return pd.Series([day_key(c, d if not pd.isna(d) else None) for c, d in zip(cube['channel'], cube['date'])],
+                     index=cube.index, dtype=object)
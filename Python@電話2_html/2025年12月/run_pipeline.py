@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+統合 → 集計 → 書式設定 を1つのプロセスで続けて実行する
+
+merge_final.py（統合）・○1generate_report_Claude.py（集計）・○2format_report_Claude.py（書式）を
+順に呼び、途中のデータは DataFrame / Workbook のままメモリで受け渡します。
+Excelを読むのはエクスポートの読み込み（変更のないファイルはキャッシュ）だけ、
+書くのは最後の集計結果だけです。途中のファイルが欲しいときは --save-merged / --save-unformatted。
+
+使用方法:
+    python run_pipeline.py                                 Python@電話1_html の下の一番新しい月
+    python run_pipeline.py D:\\電話データ --month 202512     探す場所と月を指定
+    python run_pipeline.py --input 発着信履歴_統合版.xlsx     統合済みのExcelから集計・書式だけ
+    python run_pipeline.py --save-merged --save-unformatted  途中のファイルも書く
+"""
+
+import argparse
+import datetime
+import importlib.util
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# ============================================================
+# 設定
+# ============================================================
+# 統合側のスクリプト（merge_final.py など）のあるフォルダ
+MERGE_DIR = os.path.normpath(os.path.join(HERE, '..', '..', 'Python@電話1_html'))
+# 集計・書式のスクリプト（ファイル名が ○ で始まるため import 文では読めない）
+REPORT_SCRIPT = os.path.join(HERE, '○1generate_report_Claude.py')
+FORMAT_SCRIPT = os.path.join(HERE, '○2format_report_Claude.py')
+# 出力ファイル名（既定はこのフォルダ）
+OUTPUT_FILENAME = '集計結果_{}.xlsx'
+UNFORMATTED_SUFFIX = '_書式なし'
+
+sys.path.insert(0, HERE)
+sys.path.append(MERGE_DIR)
+
+
+def load_script(name, path):
+    """ファイル名が識別子でないスクリプトをモジュールとして読み込む（main() は実行されない）"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StageTimer:
+    """工程ごとの処理時間を記録する"""
+
+    def __init__(self):
+        self.records = []
+
+    def run(self, label, func, *args, **kwargs):
+        print(f"\n--- {label} ---")
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.records.append((label, time.perf_counter() - start))
+        return result
+
+    def report(self):
+        print("\n----- 処理時間 -----")
+        for label, sec in self.records:
+            print(f"  {label}: {sec:.2f} 秒")
+        print(f"  合計: {sum(sec for _, sec in self.records):.2f} 秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="統合・集計・書式設定をまとめて実行します")
+    parser.add_argument("root", nargs="?", default=MERGE_DIR,
+                        help="エクスポートを探すフォルダ（既定: Python@電話1_html）")
+    parser.add_argument("--month", metavar="YYYYMM", help="集計する月（既定: 一番新しい月）")
+    parser.add_argument("--input", metavar="統合版.xlsx",
+                        help="統合を行わず、このExcel（統合版）から集計する")
+    parser.add_argument("-o", "--output", help="集計結果の出力先（既定: このフォルダの 集計結果_YYYY-MM-DD.xlsx）")
+    parser.add_argument("--save-merged", action="store_true",
+                        help="統合版のExcelも従来どおり出力フォルダに書く")
+    parser.add_argument("--save-unformatted", action="store_true",
+                        help="書式設定前の集計結果も書く（ファイル名の末尾に _書式なし）")
+    parser.add_argument("--dataset", action="store_true",
+                        help="月別データセットにも保存する（merge_final の既定と同じ場所）")
+    parser.add_argument("-w", "--workers", type=int, default=0,
+                        help="並列読み込みのプロセス数（0=自動, 1=並列なし）")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(HERE, OUTPUT_FILENAME.format(datetime.date.today()))
+    report = load_script('generate_report', REPORT_SCRIPT)
+    formatter = load_script('format_report', FORMAT_SCRIPT)
+    timer = StageTimer()
+
+    # 1. 統合（または統合済みExcelの読み込み）
+    if args.input:
+        sheets = timer.run("読み込み", report.load_frames, args.input)
+    else:
+        import merge_final
+        dataset_dir = None
+        if args.dataset and merge_final.call_dataset:
+            dataset_dir = os.path.abspath(os.path.join(args.root, merge_final.call_dataset.DATASET_DIRNAME))
+        month, sheets = timer.run("統合", merge_final.merge_frames, os.path.abspath(args.root), args.month,
+                                  write_excel=args.save_merged, dataset_dir=dataset_dir, workers=args.workers)
+        if month is None:
+            print(f"【エラー】{args.root} に発着信履歴_YYYYMMDD-YYYYMMDD.xlsx が見つかりません。")
+            sys.exit(1)
+        if sheets is None:
+            print("【エラー】統合に失敗しました。")
+            sys.exit(1)
+    missing = [k for k in report.REPORT_SHEETS if k not in sheets]
+    if missing:
+        print(f"【エラー】集計に必要なシートがありません: {', '.join(missing)}")
+        sys.exit(1)
+
+    # 2. 集計 → 3. 書式設定 → 4. 保存
+    wb = timer.run("集計", report.build_report, sheets)
+    if args.save_unformatted:
+        root, ext = os.path.splitext(output)
+        timer.run("書式なしを保存", wb.save, root + UNFORMATTED_SUFFIX + ext)
+    timer.run("書式設定", formatter.format_workbook, wb)
+    timer.run("保存", wb.save, output)
+
+    print(f"\n完了！出力ファイル: {output}")
+    timer.report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+必要人員の見積もり（アーラン C 式。analyze_logs 用）
+
+区間ごとの入電数と平均処理時間（秒）から、目標のサービスレベル
+（例: 80% の電話に 20 秒以内に出る）を満たすのに必要な人数を求めます。
+拠点 × 区間 の配列をまとめて渡せば、人数を1人ずつ増やしながら全部のマスを同時に判定します。
+
+階乗やべき乗を直接計算すると大きな人数で桁あふれするため、
+アーラン B の漸化式 B(n) = A·B(n-1) / (n + A·B(n-1)) から C を求めます（値は常に 0〜1）。
+"""
+
+import numpy as np
+
+
+def traffic(calls, aht, interval):
+    """呼量（アーラン）= 区間の入電数 × 平均処理時間 ÷ 区間の長さ（秒）"""
+    return np.asarray(calls, dtype=float) * np.asarray(aht, dtype=float) / interval
+
+
+def erlang_c(agents, load):
+    """待たされる確率（アーラン C）。人数が呼量以下なら 1（全員が待つ）"""
+    agents = np.asarray(agents)
+    load = np.asarray(load, dtype=float)
+    b = np.ones(np.broadcast(agents, load).shape)
+    for n in range(1, int(np.max(agents, initial=0)) + 1):
+        b = np.where(agents >= n, load * b / (n + load * b), b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c = agents * b / (agents - load * (1 - b))
+    return np.where(agents > load, c, 1.0)
+
+
+def service_level(agents, load, aht, seconds):
+    """seconds 秒以内に出られる割合"""
+    agents = np.asarray(agents)
+    load = np.asarray(load, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        wait = np.exp(-(agents - load) * seconds / np.asarray(aht, dtype=float))
+    return np.where(agents > load, 1 - erlang_c(agents, load) * wait, 0.0)
+
+
+def required_agents(load, aht, targets, max_agents=None):
+    """すべての目標を満たす最少人数（load・aht と同じ形の整数の配列）
+
+    targets: [(割合, 秒), ...]（例: [(0.8, 20), (0.95, 60)] = 8割を20秒以内・95%を60秒以内）。
+    呼量が0のマスは0人。max_agents まで増やしても届かないマスは max_agents。
+    """
+    load, aht = np.broadcast_arrays(np.asarray(load, dtype=float), np.asarray(aht, dtype=float))
+    load = np.where(aht > 0, load, 0.0)
+    if max_agents is None:
+        peak = float(load.max(initial=0))
+        max_agents = int(np.ceil(peak + 10 * np.sqrt(peak))) + 10
+    result = np.full(load.shape, max_agents, dtype=np.int64)
+    done = load <= 0
+    result[done] = 0
+
+    b = np.ones(load.shape)
+    safe_aht = np.where(aht > 0, aht, 1.0)
+    for n in range(1, max_agents + 1):
+        if done.all():
+            break
+        b = load * b / (n + load * b)
+        over = n > load
+        with np.errstate(divide='ignore', invalid='ignore'):
+            c = np.where(over, n * b / (n - load * (1 - b)), 1.0)
+        meets = over.copy()
+        for rate, seconds in targets:
+            meets &= 1 - c * np.exp(-(n - load) * seconds / safe_aht) >= rate
+        newly = meets & ~done
+        result[newly] = n
+        done |= newly
+    return result
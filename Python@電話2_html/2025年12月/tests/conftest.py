@@ -0,0 +1,17 @@
+"""集計スクリプトのテスト共通（このフォルダの1つ上を import できるようにする）"""
+
+import importlib.util
+import os
+import sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.append(os.path.normpath(os.path.join(HERE, '..', '..', 'Python@電話1_html')))
+
+
+def load_script(name, filename):
+    """ファイル名が識別子でないスクリプト（○ で始まるもの）をモジュールとして読み込む"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
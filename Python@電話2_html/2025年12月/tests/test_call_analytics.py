@@ -0,0 +1,101 @@
+"""call_analytics のテスト（同時通話数・曜日×時間帯の件数・折り返し・繰り返し着信のまとめ）"""
+
+import pandas as pd
+
+import call_analytics
+
+
+def conc(times, durations, bases):
+    """15分区間ごとの同時通話数（拠点・区間の開始時刻 → (peak, average)）"""
+    result = call_analytics.concurrency(pd.Series(pd.to_datetime(times)), durations, pd.DataFrame({'base': bases}))
+    return {(b, t.strftime('%H:%M')): (p, a) for b, t, p, a in result.itertuples(index=False)}
+
+
+def test_concurrency_end_before_start():
+    # 10:05 に終わる通話と 10:05 に始まる通話は重ねない
+    result = conc(['2025-12-01 10:00', '2025-12-01 10:05'], [300, 300], ['東京', '東京'])
+    assert result == {('東京', '10:00'): (1, 600 / 900)}
+
+
+def test_concurrency_overlap_and_bases():
+    # 東京は 10:02〜10:03 に2件重なる。横浜の通話は東京に数えない
+    result = conc(['2025-12-01 10:00', '2025-12-01 10:02', '2025-12-01 10:02'], [300, 60, 60], ['東京', '東京', '横浜'])
+    assert result == {('東京', '10:00'): (2, 360 / 900), ('横浜', '10:00'): (1, 60 / 900)}
+
+
+def test_concurrency_splits_at_interval_boundary():
+    # 10:14〜10:16 の通話は 10:00 と 10:15 の区間に1分ずつ。長さ0・時刻が空の通話は数えない
+    result = conc(['2025-12-01 10:14', '2025-12-01 10:30', None], [120, 0, 60], ['東京', '東京', '東京'])
+    assert result == {('東京', '10:00'): (1, 60 / 900), ('東京', '10:15'): (1, 60 / 900)}
+
+
+def test_slot_counts_weekday_and_slot():
+    # 2025-12-01 は月曜（0）、2025-12-07 は日曜（6）。10:20 は 10:15 の区間（36900秒）
+    start = pd.Series(pd.to_datetime(['2025-12-01 10:20', '2025-12-01 10:29', '2025-12-07 00:05', None]))
+    keys = pd.DataFrame({'base': ['東京', '東京', '横浜', '東京']})
+    result = call_analytics.slot_counts(start, keys, {'着電': [True, False, True, True]}, interval=15 * 60)
+    assert len(result) == 2 * 7 * 96
+    hits = result[result['count'] > 0]
+    assert [tuple(r) for r in hits.itertuples(index=False)] == [('東京', 0, 36900, 2, 1), ('横浜', 6, 0, 1, 1)]
+
+def test_match_callbacks_realigns_to_missed_index():
+    # 不在の着信は時刻順でなく、index も連番でない。折り返しは同じ番号へのその後最初の発信（24時間以内）
+    missed = pd.DataFrame({'dt': pd.to_datetime(['2025-12-01 11:00', '2025-12-01 10:00', '2025-12-01 12:00']),
+                           'number': ['312345678', '9011112222', '9033334444']}, index=[7, 3, 5])
+    out = pd.DataFrame({'時刻': pd.to_datetime(['2025-12-01 09:00', '2025-12-01 10:30', '2025-12-01 10:45',
+                                               '2025-12-03 09:00', '2025-12-01 13:00']),
+                        '着信番号': ['9011112222', '9011112222', '9011112222', '312345678', '8000000000']})
+    result = call_analytics.match_callbacks(missed['dt'], missed['number'], out['時刻'],
+                                            call_analytics.normalize_number(out['着信番号']), pd.Timedelta(hours=24))
+    assert result.index.tolist() == [7, 3, 5]
+    assert result['callback_row'].tolist() == [-1, 1, -1]
+    assert result.loc[3, 'callback_at'] == pd.Timestamp('2025-12-01 10:30')
+    assert result.loc[3, 'delay'] == 1800
+    assert result.loc[[7, 5], 'callback_at'].isna().all()
+
+
+def test_normalize_number_mixed_types():
+    # 整数になった番号（先頭の0が落ちたもの）と文字列の番号は同じ値。数字のないものは空欄
+    numbers = pd.Series([9011112222, '090-1111-2222', 9011112222.0, '非通知', None], dtype=object)
+    assert call_analytics.normalize_number(numbers).tolist() == ['9011112222'] * 3 + [None, None]
+
+def make_calls():
+    # 同じ番号から 10:00（東京・不在）→ 10:05（横浜・応答）とかけ直し、別の番号から1回だけ
+    return pd.DataFrame({
+        'dt': pd.to_datetime(['2025-12-01 10:00', '2025-12-01 10:05', '2025-12-01 11:00']),
+        'target_base': ['東京', '横浜', '東京'],
+        'answered': [False, True, True],
+        'number': ['9011112222', '9011112222', '312345678'],
+    })
+
+
+def episodes(calls):
+    calls = calls.join(call_analytics.repeat_calls(calls['dt'], calls['number'], 30 * 60, calls['answered']))
+    return call_analytics.repeat_episodes(calls)
+
+
+def test_repeat_episodes_first_attempt():
+    eps = episodes(make_calls())
+    repeat = eps[eps['attempts'] == 2].iloc[0]
+    assert repeat['target_base'] == '東京'
+    assert not repeat['first_answered']
+    assert repeat['any_answered']
+
+
+def test_repeat_episodes_unsorted_rows():
+    calls = make_calls()
+    pd.testing.assert_frame_equal(episodes(calls.iloc[[1, 2, 0]]), episodes(calls))
+
+
+def test_repeat_episode_ends_at_answered_call():
+    # 10:00 に着電した人が 10:10 にかけ直したら、別の問い合わせ（どちらも1回目）
+    calls = pd.DataFrame({
+        'dt': pd.to_datetime(['2025-12-01 10:00', '2025-12-01 10:10', '2025-12-01 10:20']),
+        'target_base': ['東京', '東京', '東京'],
+        'answered': [True, False, True],
+        'number': ['9011112222'] * 3,
+    })
+    eps = episodes(calls)
+    assert eps['attempts'].tolist() == [1, 2]
+    assert eps['first_answered'].tolist() == [True, False]
+    assert eps['any_answered'].tolist() == [True, True]
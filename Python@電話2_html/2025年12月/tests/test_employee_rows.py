@@ -0,0 +1,83 @@
+"""従業員別の行（build_employee_rows）が、1人×1日ずつ絞り込む素朴な方法・変更前のスクリプトの出力と一致するか"""
+
+import os
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from conftest import load_script
+
+report = load_script('generate_report', '○1generate_report_Claude.py')
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def rows_by_loop(employee_main_base, df_naisen, df_gaisen_chakushin, date_range):
+    """比較用: 1人×1日ごとに表全体を絞り込んで数える"""
+    rows = []
+    for name, base in employee_main_base.items():
+        if name in report.EXCLUDE_NAMES:
+            continue
+        counts, times = [], []
+        for df in [df_naisen, df_gaisen_chakushin]:
+            calls = df[(df['最終着信者_名前'] == name) & (df['最終着信者_拠点'] == base)]
+            counts.append(len(calls))
+            times.append(round(calls['通話時間'].mean(), 1) if len(calls) > 0 else 0)
+        daily = {}
+        for date in date_range:
+            d = date.date()
+            daily[str(d)] = sum(len(df[(df['最終着信者_名前'] == name) & (df['最終着信者_拠点'] == base) & (df['日付'] == d)])
+                                for df in [df_naisen, df_gaisen_chakushin])
+        days = sum(1 for v in daily.values() if v > 0)
+        total = sum(counts)
+        row = {'名前': name, '拠点': base, '受発注': '受発注' if name in report.JUHATCHU_LIST else None,
+               '内線': counts[0], '通話時間／秒': times[0], '外線': counts[1], '外線_時間／秒': times[1]}
+        row.update(daily)
+        row.update({'稼働日': days, '内外線計': total, '1日平均': round(total / days, 1) if days > 0 else 0})
+        rows.append(row)
+    return rows
+
+
+def make_calls(rng, n, names, bases, dates):
+    df = pd.DataFrame({
+        '最終着信者_名前': rng.choice(names + [None], n),
+        '最終着信者_拠点': rng.choice(bases + [None], n),
+        '日付': rng.choice(list(dates) + [None], n),
+        '通話時間': rng.integers(0, 600, n).astype(float),
+    })
+    df.loc[df.index[::7], '通話時間'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    names = ['高澤早紀', '佐々木美咲', '坂田智世', '松下愛', '不在']
+    bases = ['東京', '横浜', '大阪']
+    date_range = pd.date_range('2025-12-01', '2025-12-05')
+    dates = [d.date() for d in date_range]
+    df_naisen = make_calls(rng, 80, names, bases, dates)
+    df_gaisen = make_calls(rng, 120, names, bases, dates)
+    employee_main_base = {name: rng.choice(bases) for name in names}
+    employee_main_base['出勤なし'] = '東京'
+
+    expected = rows_by_loop(employee_main_base, df_naisen, df_gaisen, date_range)
+    actual = report.build_employee_rows(employee_main_base, df_naisen, df_gaisen, date_range)
+
+    assert [list(r) for r in actual] == [list(r) for r in expected]
+    for a, e in zip(actual, expected):
+        for key in e:
+            assert a[key] == e[key] or (pd.isna(a[key]) and pd.isna(e[key])), (a['名前'], key)
+
+
+def test_matches_baseline_output(tmp_path):
+    # data/employee_rows_expected.xlsx は、data/report_input.xlsx（統合版から60行ずつ抜き出したもの）を
+    # 従業員別を1人×1日ずつ数えていたころの ○1generate_report_Claude.py で集計したシート2
+    # （保存したファイルの値で比べる。空欄の平均通話時間などはメモリ上の NaN ではなく空のセルになる）
+    path = tmp_path / 'report.xlsx'
+    report.build_report(report.load_frames(os.path.join(DATA, 'report_input.xlsx'))).save(path)
+    actual = openpyxl.load_workbook(path)['2.従業員別']
+    expected = openpyxl.load_workbook(os.path.join(DATA, 'employee_rows_expected.xlsx'))['2.従業員別']
+    assert list(actual.iter_rows(values_only=True)) == list(expected.iter_rows(values_only=True))
@@ -0,0 +1,65 @@
+"""日別の部分集計（report_cube.build_incremental）のテスト"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import report_cube
+
+
+def prepare(df):
+    """集計用の列を足す（テスト用の簡単なもの）"""
+    df['target_base'] = df['着信者']
+    df['final_base'] = df['着信者']
+    df['final_name'] = df['最終着信者']
+    df['answered'] = df['最終着信者'].notna().to_numpy()
+    dt = pd.to_datetime(df['時刻'], errors='coerce')
+    df['date'] = dt.dt.date
+    df['in_biz'] = (dt.dt.hour >= 9).to_numpy()
+    return df
+
+
+def make_calls():
+    return pd.DataFrame({
+        '時刻': pd.to_datetime(['2025-12-01 08:30', '2025-12-01 10:00', '2025-12-02 11:00',
+                              '2025-12-02 12:00', None]),
+        '着信者': ['東京', '東京', '横浜', '東京', '横浜'],
+        '最終着信者': ['高澤', None, '奥秋', '高澤', None],
+        '通話時間': [30.0, np.nan, 60.0, 90.0, 10.0],
+    })
+
+
+def summary(cube):
+    return cube.groupby(['channel', 'target_base', 'answered'], dropna=False)[['count', 'talk_sum']].sum()
+
+
+def test_blank_time_row(tmp_path):
+    df = make_calls()
+    expected = report_cube.build({'外線': prepare(df.copy())})
+
+    store = report_cube.DayStore(str(tmp_path))
+    cube, rebuilt, reused = report_cube.build_incremental({'外線': df}, prepare, store=store)
+    assert (rebuilt, reused) == (3, 0)  # 12/1, 12/2, 時刻が空の行
+    assert int(cube['count'].sum()) == len(df)
+    pd.testing.assert_frame_equal(summary(cube), summary(expected))
+
+    # 2回目は保存分を使う。1日分だけ変えるとその日だけ集計し直す
+    store = report_cube.DayStore(str(tmp_path))
+    cube, rebuilt, reused = report_cube.build_incremental({'外線': df}, prepare, store=store)
+    assert (rebuilt, reused) == (0, 3)
+    pd.testing.assert_frame_equal(summary(cube), summary(expected))
+
+    df.loc[2, '通話時間'] = 70.0
+    store = report_cube.DayStore(str(tmp_path))
+    cube, rebuilt, reused = report_cube.build_incremental({'外線': df}, prepare, store=store)
+    assert (rebuilt, reused) == (1, 2)
+    assert cube['talk_sum'].sum() == 30 + 70 + 90 + 10
+
+
+def test_date_range_skips_blank_time(tmp_path):
+    store = report_cube.DayStore(str(tmp_path))
+    cube, _, _ = report_cube.build_incremental({'外線': make_calls()}, prepare, store=store,
+                                               start=datetime.date(2025, 12, 2), end=datetime.date(2025, 12, 2))
+    assert int(cube['count'].sum()) == 2
+    assert set(cube['date']) == {datetime.date(2025, 12, 2)}
@@ -0,0 +1,30 @@
+"""必要人員の見積もり（staffing）のテスト"""
+
+import numpy as np
+import pytest
+
+import staffing
+
+
+def test_erlang_c_table_value():
+    # 呼量 10 アーラン・12人 で待たされる確率は 0.4494（アーラン C の表の値）
+    assert staffing.erlang_c(12, 10.0) == pytest.approx(0.4494, abs=1e-4)
+    # 人数が呼量以下なら全員が待つ
+    assert staffing.erlang_c(10, 10.0) == 1.0
+
+
+def test_traffic():
+    # 1時間に200件 × 平均180秒 = 10 アーラン
+    assert staffing.traffic(200, 180, 3600) == pytest.approx(10.0)
+
+
+def test_required_agents_meets_target():
+    # 10 アーラン・平均180秒で「8割を20秒以内」: 13人では 79.6% で届かず、14人で 88.8%
+    assert staffing.service_level(13, 10.0, 180, 20) < 0.8 <= staffing.service_level(14, 10.0, 180, 20)
+    result = staffing.required_agents(np.array([10.0, 0.0]), np.array([180.0, 180.0]), [(0.8, 20)])
+    assert result.tolist() == [14, 0]
+
+
+def test_required_agents_all_targets():
+    # 「98% を60秒以内」も足すと 14人（95.4%）では届かず、15人（98.1%）になる
+    assert staffing.required_agents(10.0, 180.0, [(0.8, 20), (0.98, 60)]) == 15
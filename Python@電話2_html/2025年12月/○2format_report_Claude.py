@@ -363,12 +363,8 @@ def format_sheet6(ws):
                     cell.number_format = '0.0%'
 
 
-def format_excel(filepath):
-    """Excelファイル全体の書式を設定"""
-    print(f"\n書式設定中: {filepath}")
-    
-    wb = load_workbook(filepath)
-    
+def format_workbook(wb):
+    """Workbook 全体の書式を設定（ファイルを介さずに使う場合はこちら）"""
     # 各シートの書式設定
     if '1.着信件数' in wb.sheetnames:
         format_sheet1(wb['1.着信件数'])
@@ -387,6 +383,15 @@ def format_excel(filepath):
     
     if '6.時間内集計' in wb.sheetnames:
         format_sheet6(wb['6.時間内集計'])
+    return wb
+
+
+def format_excel(filepath):
+    """Excelファイル全体の書式を設定"""
+    print(f"\n書式設定中: {filepath}")
+    
+    wb = load_workbook(filepath)
+    format_workbook(wb)
     
     # 保存
     wb.save(filepath)
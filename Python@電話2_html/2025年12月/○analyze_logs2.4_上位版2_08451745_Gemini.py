@@ -5,6 +5,19 @@ import os
 import sys
 import datetime
 import warnings
+import zipfile
+import functools
+import itertools
+import xml.etree.ElementTree as ET
+
+# 集計用の列を作る共通処理（同じフォルダの call_features.py）
+import call_features
+# シート1〜6 の件数は集計キューブ（日別に保存）から取り出す（同じフォルダの report_cube.py）
+import report_cube
+# 同時通話数などの行ごとの分析（同じフォルダの call_analytics.py）
+import call_analytics
+# 必要人員の見積もり（同じフォルダの staffing.py）
+import staffing
 
 # 警告を無視
 warnings.simplefilter('ignore')
@@ -15,6 +28,24 @@ try:
 except:
     pass
 
+# ★Excel読み込みキャッシュ（Python@電話1_html 側の xlsx_cache.py）。
+#   同じフォルダにコピーしてもOK。見つからなければ毎回Excelを読む
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'Python@電話1_html'))
+try:
+    import xlsx_cache
+except ImportError:
+    xlsx_cache = None
+    print("  [!] 注意: xlsx_cache.py が見つからないため、キャッシュを使わずに毎回Excelを読みます"
+          "（Python@電話1_html の xlsx_cache.py をこのフォルダにコピーしてください）")
+# ★列の型をそろえる（同じ場所の sheet_schema.py）。見つからなければ型はExcelまかせ
+try:
+    import sheet_schema
+except ImportError:
+    sheet_schema = None
+    print("  [!] 注意: sheet_schema.py が見つからないため、列の型はそろえずに読み込みます"
+          "（Python@電話1_html の sheet_schema.py をこのフォルダにコピーしてください）")
+
 # ==========================================
 # 1. 設定エリア
 # ==========================================
@@ -23,8 +54,14 @@ BASE_ORDER = [
     '千葉', '福岡', '岡山', '名古屋', '仙台', '流山'
 ]
 EXCLUDE_KEYWORDS = ['不在', '未応答', '応答なし', '放棄', '留守電']
+EXCLUDE_PATTERN = re.compile('|'.join(map(re.escape, EXCLUDE_KEYWORDS)))
 BIZ_START = datetime.time(8, 45, 0)
 BIZ_END = datetime.time(17, 45, 0)
+# 曜日・拠点で営業時間が違う場合はここに書く（空なら毎日 BIZ_START〜BIZ_END）
+#   例: BIZ_HOURS_BY_WEEKDAY = {5: (datetime.time(9, 0), datetime.time(12, 0)), 6: None}  ← 土曜は午前のみ・日曜は休み
+#   例: BIZ_HOURS_BY_BASE = {'福岡': (datetime.time(9, 0), datetime.time(18, 0))}          ← 着信した拠点で判定
+BIZ_HOURS_BY_WEEKDAY = {}
+BIZ_HOURS_BY_BASE = {}
 TRANS_FROM = {
     '東京': '流山', '横浜': '多摩', '埼玉': '千葉・北関東',
     '滋賀': '金沢', '福岡': '広島・熊本', '岡山': '大阪・静岡', '仙台': '札幌'
@@ -65,6 +102,36 @@ JUHATCHU_MEMBERS_RAW = [
     "【名古屋】玉腰千恵", "【名古屋】水島奈美", "【名古屋】大渕温子"
 ]
 
+# ★見出し行を探す範囲（シートの先頭から何行目までに見出しがあるか）
+HEADER_SCAN_ROWS = 20
+
+# ★日別の集計を保存するフォルダ（None なら保存しない）。
+#   前回から中身の変わった日だけを集計し直し、残りの日は保存分をつなぐ
+DAY_STORE_DIR = '集計_日別'
+# ★集計する期間（None なら読み込んだデータの全期間）。期間を指定すると保存済みの日も含めて集計する
+#   例: REPORT_START = datetime.date(2025, 12, 1); REPORT_END = datetime.date(2025, 12, 7)  ← 週次
+#   例: REPORT_LAST_DAYS = 7  ← データの最終日（REPORT_END があればその日）までの直近7日
+REPORT_START = None
+REPORT_END = None
+REPORT_LAST_DAYS = None
+
+# ★同時通話数（シート7・8）: 区間の長さ（分）と、通話の長さに使う列（呼び出し中も回線はふさがるので応答前を含む）
+CONCURRENCY_MINUTES = 15
+CONCURRENCY_DURATION_COL = '通話時間（応答までの時間を含む）'
+# 行ごとの分析（シート7〜13）で使う元の列
+ROW_COLUMNS = [CONCURRENCY_DURATION_COL, '通話時間', '発信番号', '着信者']
+# ★時間帯別の入電（シート9）: 区間の長さ（分。15 か 30）
+HEATMAP_MINUTES = 30
+WEEKDAY_NAMES = ['月', '火', '水', '木', '金', '土', '日']
+# ★必要人員（シート10）: 満たしたい目標 [(割合, 秒), ...]。シート9 と同じ区間・営業時間内で見積もる
+#   (0.8, 20) = 8割の電話に20秒以内に出る（サービスレベル）、(0.95, 60) = 95%は60秒以内に出る（応答率の目安）
+STAFFING_TARGETS = [(0.8, 20), (0.95, 60)]
+# ★折り返し（シート11・12）: 不在の着信から何時間以内の同じ番号への発信を「折り返し」とみなすか
+CALLBACK_WINDOW_HOURS = 24
+# ★繰り返し着信（シート13）: 前の着信から何分以内のかけ直しを同じ問い合わせとみなすか・何回以上を「多い」とするか
+REPEAT_WINDOW_MINUTES = 60
+REPEAT_ALERT_CALLS = 3
+
 # ==========================================
 # 2. 関数定義
 # ==========================================
@@ -77,9 +144,7 @@ def extract_base_name(text):
 
 def is_valid_answer(name):
     if not isinstance(name, str): return False
-    for kw in EXCLUDE_KEYWORDS:
-        if kw in name: return False
-    return True
+    return not EXCLUDE_PATTERN.search(name)
 
 def my_round(x):
     try:
@@ -88,30 +153,112 @@ def my_round(x):
         return int(val * 10 + 0.5) / 10.0
     except: return x
 
-def smart_read_excel(file, sheet_name):
+# ★見出し行の判定ルール（セルの値を文字列にしたリスト → 見出し行なら True）
+def is_call_header(cells):
+    return any('着信者' in s for s in cells) or any('時刻' in s for s in cells)
+
+def is_jitan_header(cells):
+    cells = [s.strip() for s in cells]
+    return ('氏名' in cells or '名前' in cells) and '勤務時間' in cells
+
+def _convert_cell(cell):
+    # pandas の openpyxl 読み込みと同じ変換（空欄 → ""、エラー → NaN、整数の数値 → int）
+    if cell.value is None: return ""
+    if cell.data_type == 'e': return float('nan')
+    if cell.data_type == 'n':
+        val = int(cell.value)
+        return val if val == cell.value else float(cell.value)
+    return cell.value
+
+def read_sheet_with_header(file, sheet_name, is_header):
+    # シートを1回だけ先頭から読み、最初の HEADER_SCAN_ROWS 行で見出し行を探して、
+    # 同じ読み込みの続きでデータ部分まで DataFrame にする（見つからなければ1行目が見出し）
+    import openpyxl
+    from pandas.io.parsers import TextParser
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
     try:
-        preview = pd.read_excel(file, sheet_name=sheet_name, header=None, nrows=20)
-        target_row = 0
-        for i, row in preview.iterrows():
-            row_str = row.astype(str).values
-            if any('着信者' in s for s in row_str) or any('時刻' in s for s in row_str):
-                target_row = i
-                break
-        return pd.read_excel(file, sheet_name=sheet_name, header=target_row)
-    except:
+        ws = wb[sheet_name]
+        ws.reset_dimensions()
+        rows = ([_convert_cell(c) for c in row] for row in ws.rows)
+        head = list(itertools.islice(rows, HEADER_SCAN_ROWS))
+        target_row = next((i for i, row in enumerate(head) if is_header([str(v) for v in row])), 0)
+        data = []
+        for row in itertools.chain(head, rows):
+            while row and row[-1] == "": row.pop()
+            data.append(row)
+    finally:
+        wb.close()
+    while data and not data[-1]: data.pop()
+    if not data:
         return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [""] * (width - len(row)) for row in data]
+    return TextParser(data, header=target_row, skip_blank_lines=False).read()
+
+def read_excel(file, typed=False, header_rule=None, **kwargs):
+    # typed=True: 発着信履歴のシートは列の型をそろえる（キャッシュには型をそろえた結果が残る）
+    # header_rule: 見出し行の判定ルール。渡すと見出し行を探しながら1回で読む
+    transform = sheet_schema.apply_types if typed and sheet_schema else None
+    loader = functools.partial(read_sheet_with_header, is_header=header_rule) if header_rule else None
+    if xlsx_cache:
+        if transform:
+            kwargs.update(transform=transform, transform_key=f"types{sheet_schema.TYPES_VERSION}")
+        if loader:
+            kwargs.update(loader=loader, loader_key=f"header:{header_rule.__name__}:{HEADER_SCAN_ROWS}")
+        return xlsx_cache.read_excel(file, **kwargs)
+    df = loader(file, **kwargs) if loader else pd.read_excel(file, **kwargs)
+    return transform(kwargs.get('sheet_name', 0), df) if transform else df
+
+# ★ブックのシート名一覧（パス → ((更新日時, サイズ), シート名)）。内線・外線の検索で使い回す
+_WORKBOOK_INDEX = {}
+
+def read_workbook_sheet_names(file):
+    # xlsx（zip）の中の workbook.xml だけを読む。シート本体は開かない
+    with zipfile.ZipFile(file) as z:
+        target = 'xl/workbook.xml'
+        try:
+            rels = ET.fromstring(z.read('_rels/.rels'))
+            for rel in rels:
+                if rel.get('Type', '').endswith('/officeDocument'):
+                    target = rel.get('Target').lstrip('/')
+                    break
+        except (KeyError, ET.ParseError):
+            pass
+        with z.open(target) as f:
+            return [elem.get('name') for _, elem in ET.iterparse(f)
+                    if elem.tag.rsplit('}', 1)[-1] == 'sheet']
+
+def list_sheet_names(file):
+    st = os.stat(file)
+    key = os.path.abspath(file)
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _WORKBOOK_INDEX.get(key)
+    if hit and hit[0] == stamp:
+        return hit[1]
+    try:
+        names = read_workbook_sheet_names(file)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        names = pd.ExcelFile(file).sheet_names  # 形式が想定外なら従来どおり開いて調べる
+    _WORKBOOK_INDEX[key] = (stamp, names)
+    return names
+
+def smart_read_excel(file, sheet_name):
+    # 列の型をそろえられないとき（想定外の値など）は、型をそろえずに読み直す。それでも読めなければエラーを表示して止める
+    try:
+        return read_excel(file, typed=True, sheet_name=sheet_name, header_rule=is_call_header)
+    except Exception as e:
+        print(f"  [!] 注意: {os.path.basename(file)} の「{sheet_name}」は列の型をそろえられませんでした（{e}）→ 型をそろえずに読み込みます")
+    try:
+        return read_excel(file, sheet_name=sheet_name, header_rule=is_call_header)
+    except Exception as e:
+        print(f"\n【エラー】{os.path.basename(file)} の「{sheet_name}」を読み込めませんでした: {e}")
+        raise
 
 def smart_read_jitan(file, sheet_name):
     try:
-        preview = pd.read_excel(file, sheet_name=sheet_name, header=None, nrows=20)
-        target_row = 0
-        for i, row in preview.iterrows():
-            row_str = [str(x).strip() for x in row.values]
-            if ('氏名' in row_str or '名前' in row_str) and '勤務時間' in row_str:
-                target_row = i
-                break
-        return pd.read_excel(file, sheet_name=sheet_name, header=target_row)
-    except:
+        return read_excel(file, sheet_name=sheet_name, header_rule=is_jitan_header)
+    except Exception as e:
+        print(f"  [!] 注意: {os.path.basename(file)} の「{sheet_name}」を読み込めませんでした（{e}）→ 時短データなしで続けます")
         return pd.DataFrame()
 
 def find_and_load(target_keywords, exclude_keywords=[]):
@@ -119,8 +266,7 @@ def find_and_load(target_keywords, exclude_keywords=[]):
     for file in glob.glob("*.xlsx"):
         if "集計結果" in file: continue
         try:
-            xls = pd.ExcelFile(file)
-            for sheet in xls.sheet_names:
+            for sheet in list_sheet_names(file):
                 if any(k in sheet for k in target_keywords):
                     if not any(ek in sheet for ek in exclude_keywords):
                         candidates.append({'file': file, 'sheet': sheet, 'type': 'xlsx'})
@@ -414,17 +560,72 @@ def decorate_excel(filename):
                     if c == 16 and isinstance(val, (int, float)):
                         ws.cell(row=r, column=c).number_format = '0.0%'
 
+        elif sheet_name == '9.時間帯別_入電':
+            for c in range(1, ws.max_column + 1):
+                set_cell_style(ws.cell(row=1, column=c), "header")
+            for r in range(2, ws.max_row + 1):
+                is_rate = ws.cell(row=r, column=3).value == '応答率'
+                for c in range(1, ws.max_column + 1):
+                    cell = ws.cell(row=r, column=c)
+                    set_cell_style(cell, "data", cell.value)
+                    if is_rate and c > 3 and isinstance(cell.value, (int, float)):
+                        cell.number_format = '0.0%'
+            ws.freeze_panes = 'D2'
+
         else:
             for c in range(1, ws.max_column + 1):
                 set_cell_style(ws.cell(row=1, column=c), "header")
+            rate_cols = {c for c in range(1, ws.max_column + 1) if '率' in str(ws.cell(row=1, column=c).value)}
             for r in range(2, ws.max_row + 1):
+                style = "total" if ws.cell(row=r, column=1).value == "合計" else "data"
                 for c in range(1, ws.max_column + 1):
                     val = ws.cell(row=r, column=c).value
-                    set_cell_style(ws.cell(row=r, column=c), "data", val)
+                    set_cell_style(ws.cell(row=r, column=c), style, val)
+                    if c in rate_cols and isinstance(val, (int, float)):
+                        ws.cell(row=r, column=c).number_format = '0.0%'
 
     wb.save(filename)
     print(" -> Excelファイルの装飾・数値書式設定が完了しました。")
 
+def call_rows(df, columns=()):
+    """通話の表から、拠点・名前・着電・日時の列（と columns の列）だけの新しい表を作る（元の表は変えない）"""
+    rows = pd.DataFrame(index=df.index)
+    # 「【拠点】名前」は種類ごとに1回だけ解析（結果は category の列。解析結果は実行中ずっと使い回す）
+    if '着信者' in df.columns:
+        rows['target_base'], _ = call_features.split_caller(df['着信者'], extract_base_name)
+    else: rows['target_base'] = None
+    if '最終着信者' in df.columns:
+        rows['final_base'], rows['final_name'] = call_features.split_caller(df['最終着信者'], extract_base_name)
+    else:
+        rows['final_base'] = None
+        rows['final_name'] = None
+    # 応答したか（着電）/ 不在か は最初に一度だけ判定し、各シートで使い回す
+    rows['answered'] = call_features.map_unique(rows['final_name'], is_valid_answer).astype(bool)
+    if '時刻' in df.columns:
+        rows['dt'] = pd.to_datetime(df['時刻'], errors='coerce')  # 型をそろえた列ならそのまま
+        rows['date'] = rows['dt'].dt.date
+    for col in columns:
+        if col in df.columns:
+            rows[col] = df[col]
+    return rows
+
+def prepare_calls(df):
+    """読み込んだ通話の表に集計用の列（拠点・名前・着電・日付・営業時間内）を足す"""
+    for col, values in call_rows(df).items():
+        df[col] = values
+    if '時刻' in df.columns:
+        df['day'] = df['dt'].dt.day
+        # 営業時間内か（0時からの秒数で判定。時刻が空の行は False）
+        df['sec'] = call_features.seconds_of_day(df['dt'])
+        df['in_biz'] = call_features.business_hours_mask(
+            df['dt'], BIZ_START, BIZ_END,
+            by_weekday=BIZ_HOURS_BY_WEEKDAY, by_base=BIZ_HOURS_BY_BASE, base=df['target_base'])
+    return df
+
+def store_config():
+    """日別の保存分の集計結果を変える設定（変わったら保存分は使わずに作り直す）"""
+    return repr((EXCLUDE_KEYWORDS, BIZ_START, BIZ_END, BIZ_HOURS_BY_WEEKDAY, BIZ_HOURS_BY_BASE))
+
 # ==========================================
 # 3. メイン処理
 # ==========================================
@@ -434,6 +635,7 @@ def main():
 
     df_int = find_and_load(['内線通話', '内線'], exclude_keywords=['発信'])
     df_ext = find_and_load(['外線着信', '外線'], exclude_keywords=['発信'])
+    df_out = find_and_load(['外線発信'])
 
     print(f"\nデータ件数: 内線={len(df_int)}件, 外線={len(df_ext)}件, 時短=4名(固定)")
 
@@ -441,58 +643,70 @@ def main():
         print("\n【エラー】データが見つかりません。")
         return
 
-    data_year_month = None
-    for df in [df_int, df_ext]:
-        if df.empty: continue
-        df.columns = [str(c).strip() for c in df.columns]
-        if '着信者' in df.columns:
-            df['target_base'], _ = zip(*df['着信者'].apply(extract_base_name))
-        else: df['target_base'] = None
-        if '最終着信者' in df.columns:
-            df['final_base'], df['final_name'] = zip(*df['最終着信者'].apply(extract_base_name))
-        else:
-            df['final_base'] = None
-            df['final_name'] = None
-        if '時刻' in df.columns:
-            df['dt'] = pd.to_datetime(df['時刻'].astype(str), errors='coerce')
-            df['day'] = df['dt'].dt.day
-            df['time'] = df['dt'].dt.time
-            df['date'] = df['dt'].dt.date
-            if data_year_month is None and not df['dt'].dropna().empty:
-                first_date = df['dt'].dropna().iloc[0]
-                data_year_month = (first_date.year, first_date.month)
-
-    all_dates = set()
-    if not df_int.empty: all_dates.update(df_int['date'].dropna().unique())
-    if not df_ext.empty: all_dates.update(df_ext['date'].dropna().unique())
+    for df in [df_int, df_ext, df_out]:
+        if not df.empty:
+            df.columns = [str(c).strip() for c in df.columns]
+
+    # 集計する期間
+    start, end = REPORT_START, REPORT_END
+    if REPORT_LAST_DAYS:
+        if end is None:
+            last = [pd.to_datetime(df['時刻'], errors='coerce').max() for df in [df_int, df_ext] if '時刻' in df.columns]
+            last = [d for d in last if pd.notna(d)]
+            end = max(last).date() if last else datetime.date.today()
+        start = end - datetime.timedelta(days=REPORT_LAST_DAYS - 1)
+    if start or end:
+        print(f"集計期間: {start or '最初'} 〜 {end or '最後'}")
+
+    # 集計キューブ（チャネル×拠点×名前×日付×営業時間内×着電 ごとの件数）を日別の保存分から作る
+    store = report_cube.DayStore(DAY_STORE_DIR, store_config()) if DAY_STORE_DIR else None
+    cube, rebuilt, reused = report_cube.build_incremental(
+        {'内線': df_int, '外線': df_ext}, prepare_calls, store=store, start=start, end=end)
+    if store is not None:
+        print(f"日別集計: {rebuilt}日分を集計、{reused}日分は保存済みを使用")
+
+    all_dates = set(cube['date'].dropna())
     total_operating_days = len(all_dates) if all_dates else 1
-    
-    # --- Sheet 1 Data ---
-    if not df_int.empty and 'final_name' in df_int.columns:
-        df_int_valid = df_int[df_int['final_name'].apply(is_valid_answer)].copy()
-    else: df_int_valid = pd.DataFrame()
+    data_year_month = None
+    if all_dates:
+        first_date = min(all_dates)
+        data_year_month = (first_date.year, first_date.month)
 
-    if not df_ext.empty and 'final_name' in df_ext.columns:
-        df_ext_valid = df_ext[df_ext['final_name'].apply(is_valid_answer)].copy()
-    else: df_ext_valid = pd.DataFrame()
+    # 行ごとの分析（シート7〜13）用の表。必要な列だけを別に作る（期間の指定があればその期間の行だけ）
+    calls = {}
+    for channel, df in [('内線', df_int), ('外線', df_ext)]:
+        if df.empty: continue
+        rows = call_rows(df, ROW_COLUMNS)
+        if (start or end) and 'date' in rows.columns:
+            rows = report_cube.between(rows, start, end)
+        calls[channel] = rows
+    # シート7〜13は今回読み込んだ行だけから作るので、日数もその行のある日で数える
+    # （期間を指定すると、キューブには今回の入力に無い保存済みの日も入る）
+    row_dates = set()
+    for rows in calls.values():
+        if 'date' in rows.columns:
+            row_dates |= set(rows['date'].dropna().unique())
+    stored_only = all_dates - row_dates
+    if stored_only:
+        print(f"  [!] 注意: 保存済みの{len(stored_only)}日分は今回の入力に無いため、シート1〜6だけに入ります")
 
+    # --- Sheet 1 Data ---
     all_bases = set(BASE_ORDER)
-    if not df_int.empty and 'target_base' in df_int.columns: all_bases |= set(df_int['target_base'].dropna())
-    if not df_ext.empty and 'target_base' in df_ext.columns: all_bases |= set(df_ext['target_base'].dropna())
+    for channel in report_cube.CHANNELS:
+        all_bases |= set(report_cube.select(cube, channel=channel)['target_base'].dropna())
     sorted_bases = sorted(list(all_bases), key=lambda x: BASE_ORDER.index(x) if x in BASE_ORDER else 999)
 
     s1 = pd.DataFrame(index=sorted_bases)
     s1.index.name = '拠点'
     
-    def get_counts(df, col):
-        if df.empty or col not in df.columns: return {}
-        return df[col].value_counts()
+    def get_counts(channel, col, **where):
+        return report_cube.counts(cube, col, channel=channel, **where)
 
     s1_data = {
-        ('内線', '入電'): s1.index.map(get_counts(df_int, 'target_base')).fillna(0).astype(int),
-        ('内線', '着電'): s1.index.map(get_counts(df_int_valid, 'final_base')).fillna(0).astype(int),
-        ('外線', '入電'): s1.index.map(get_counts(df_ext, 'target_base')).fillna(0).astype(int),
-        ('外線', '着電'): s1.index.map(get_counts(df_ext_valid, 'final_base')).fillna(0).astype(int),
+        ('内線', '入電'): s1.index.map(get_counts('内線', 'target_base')).fillna(0).astype(int),
+        ('内線', '着電'): s1.index.map(get_counts('内線', 'final_base', answered=True)).fillna(0).astype(int),
+        ('外線', '入電'): s1.index.map(get_counts('外線', 'target_base')).fillna(0).astype(int),
+        ('外線', '着電'): s1.index.map(get_counts('外線', 'final_base', answered=True)).fillna(0).astype(int),
         ('他拠点へ転送', ' '): s1.index.map(TRANS_TO).fillna(''),
         ('他拠点から転送', ' '): s1.index.map(TRANS_FROM).fillna('')
     }
@@ -522,21 +736,16 @@ def main():
     s1_summary = pd.DataFrame(summary_rows)
 
     # --- Sheet 2 ---
-    cols = ['final_name', 'final_base', '通話時間', 'day', 'date']
     s2 = pd.DataFrame()
+    cube_valid = report_cube.select(cube, answered=True)
 
-    if (not df_int_valid.empty) or (not df_ext_valid.empty):
-        if not df_int_valid.empty and set(cols).issubset(df_int_valid.columns):
-            grp_int = df_int_valid.groupby(['final_name', 'final_base'])
-            s2_int = grp_int.agg(内線件数=('通話時間', 'size'), 内線合計=('通話時間', 'sum'))
-        else: s2_int = pd.DataFrame(columns=['内線件数', '内線合計'])
-
-        if not df_ext_valid.empty and set(cols).issubset(df_ext_valid.columns):
-            grp_ext = df_ext_valid.groupby(['final_name', 'final_base'])
-            s2_ext = grp_ext.agg(外線件数=('通話時間', 'size'), 外線合計=('通話時間', 'sum'))
-        else: s2_ext = pd.DataFrame(columns=['外線件数', '外線合計'])
+    if not cube_valid.empty:
+        def channel_totals(channel, prefix):
+            part = report_cube.select(cube_valid, channel=channel)
+            grp = part.groupby(['final_name', 'final_base'])
+            return grp.agg(**{f'{prefix}件数': ('count', 'sum'), f'{prefix}合計': ('talk_sum', 'sum')})
 
-        s2 = s2_int.join(s2_ext, how='outer').fillna(0)
+        s2 = channel_totals('内線', '内線').join(channel_totals('外線', '外線'), how='outer').fillna(0)
         
         juhatchu_set = set()
         for raw_name in JUHATCHU_MEMBERS_RAW:
@@ -550,31 +759,30 @@ def main():
         s2['通話時間／秒'] = (s2['内線合計'] / s2['内線件数'].replace(0, 1)).apply(my_round)
         s2['外線'] = s2['外線件数']
         s2['外線_時間／秒'] = (s2['外線合計'] / s2['外線件数'].replace(0, 1)).apply(my_round)
-        
-        df_all_valid = pd.concat([df_int_valid[cols] if not df_int_valid.empty else pd.DataFrame(), df_ext_valid[cols] if not df_ext_valid.empty else pd.DataFrame()])
-        
-        if not df_all_valid.empty:
-            if data_year_month:
+
+        if data_year_month:
+            # 日別の列: 期間を指定したらその期間の毎日、なければデータの月の毎日
+            if start or end:
+                first, last = start or min(all_dates), end or max(all_dates)
+                days = [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
+            else:
                 y, m = data_year_month
-                daily = df_all_valid.pivot_table(index=['final_name', 'final_base'], columns='day', aggfunc='size', fill_value=0)
-                date_cols = {}
+                days = []
                 for d in range(1, 32):
-                    try:
-                        date_str = datetime.date(y, m, d).strftime('%Y-%m-%d')
-                        if d not in daily.columns: daily[d] = 0
-                        date_cols[d] = date_str
+                    try: days.append(datetime.date(y, m, d))
                     except ValueError: pass
-                daily = daily.rename(columns=date_cols)
-                daily = daily[sorted(list(date_cols.values()))]
-                daily['稼働日'] = (daily > 0).sum(axis=1)
-                s2 = s2.join(daily).reset_index()
-                s2['内外線計'] = s2['内線'] + s2['外線']
-                s2['1日平均'] = s2.apply(lambda r: my_round(r['内外線計'] / r['稼働日']) if r['稼働日'] > 0 else 0, axis=1)
-                s2 = s2.rename(columns={'final_name': '名前', 'final_base': '拠点'})
-                s2['base_rank'] = s2['拠点'].apply(lambda x: BASE_ORDER.index(x) if x in BASE_ORDER else 999)
-                s2 = s2.sort_values(['base_rank', '名前']).drop(columns='base_rank')
-                final_cols = ['名前', '拠点', '受発注', '内線', '通話時間／秒', '外線', '外線_時間／秒'] + sorted(list(date_cols.values())) + ['稼働日', '内外線計', '1日平均']
-                s2 = s2[[c for c in final_cols if c in s2.columns]]
+            date_cols = {day: day.strftime('%Y-%m-%d') for day in days}
+            daily = cube_valid.pivot_table(index=['final_name', 'final_base'], columns='date', values='count', aggfunc='sum', fill_value=0)
+            daily = daily.reindex(columns=days, fill_value=0).rename(columns=date_cols)
+            daily['稼働日'] = (daily > 0).sum(axis=1)
+            s2 = s2.join(daily).reset_index()
+            s2['内外線計'] = s2['内線'] + s2['外線']
+            s2['1日平均'] = s2.apply(lambda r: my_round(r['内外線計'] / r['稼働日']) if r['稼働日'] > 0 else 0, axis=1)
+            s2 = s2.rename(columns={'final_name': '名前', 'final_base': '拠点'})
+            s2['base_rank'] = s2['拠点'].apply(lambda x: BASE_ORDER.index(x) if x in BASE_ORDER else 999)
+            s2 = s2.sort_values(['base_rank', '名前']).drop(columns='base_rank')
+            final_cols = ['名前', '拠点', '受発注', '内線', '通話時間／秒', '外線', '外線_時間／秒'] + list(date_cols.values()) + ['稼働日', '内外線計', '1日平均']
+            s2 = s2[[c for c in final_cols if c in s2.columns]]
 
     # --- Sheet 3 ---
     if ('外線', '着電') in s1.columns:
@@ -583,7 +791,10 @@ def main():
     else: s3 = pd.DataFrame(columns=['拠点名', '外線(実績)'])
     
     s3 = s3[s3['拠点名'] != '合計'].copy()
-    col_name_total = f"{data_year_month[0]}年{data_year_month[1]}月から外線のみ" if data_year_month else "期間計"
+    if start or end:
+        col_name_total = f"{start or min(all_dates, default='')}〜{end or max(all_dates, default='')} 外線のみ"
+    else:
+        col_name_total = f"{data_year_month[0]}年{data_year_month[1]}月から外線のみ" if data_year_month else "期間計"
     s3 = s3.rename(columns={'外線(実績)': col_name_total})
     s3['外線のみ'] = s3[col_name_total].apply(lambda x: my_round(x / total_operating_days) if total_operating_days > 0 else 0)
 
@@ -650,11 +861,7 @@ def main():
     # --- Sheet 5 ---
     s5 = pd.DataFrame(index=sorted_bases)
     s5.index.name = '拠点名'
-    if not df_ext_valid.empty and 'time' in df_ext_valid.columns:
-        df_ext_valid_clean = df_ext_valid.dropna(subset=['time'])
-        df_ext_biz = df_ext_valid_clean[df_ext_valid_clean['time'].apply(lambda t: BIZ_START <= t <= BIZ_END)]
-        s5['営業時間内_外線のみ'] = s5.index.map(df_ext_biz['final_base'].value_counts()).fillna(0).astype(int)
-    else: s5['営業時間内_外線のみ'] = 0
+    s5['営業時間内_外線のみ'] = s5.index.map(get_counts('外線', 'final_base', answered=True, in_biz=True)).fillna(0).astype(int)
 
     s5['人員'] = s5.index.map(s3.set_index('拠点名')['人員']).fillna(0).astype(int)
     s5['1人当たり／月'] = s5.apply(lambda r: my_round(r['営業時間内_外線のみ'] / r['人員']) if r['人員'] > 0 else 0.0, axis=1)
@@ -666,19 +873,11 @@ def main():
     s6 = pd.DataFrame(index=sorted_bases)
     s6.index.name = '拠点'
 
-    def get_biz_target_counts(df, valid_only=False):
-        if df.empty or 'time' not in df.columns or 'target_base' not in df.columns: return {}
-        temp_df = df.dropna(subset=['time']).copy()
-        filtered = temp_df[temp_df['time'].apply(lambda t: BIZ_START <= t <= BIZ_END)]
-        if valid_only:
-            filtered = filtered[filtered['final_name'].apply(is_valid_answer)]
-        return filtered['target_base'].value_counts()
-
     s6_data = {
-        ('内線', '入電'): s6.index.map(get_biz_target_counts(df_int, valid_only=False)).fillna(0).astype(int),
-        ('内線', '着電'): s6.index.map(get_biz_target_counts(df_int, valid_only=True)).fillna(0).astype(int),
-        ('外線', '入電'): s6.index.map(get_biz_target_counts(df_ext, valid_only=False)).fillna(0).astype(int),
-        ('外線', '着電'): s6.index.map(get_biz_target_counts(df_ext, valid_only=True)).fillna(0).astype(int),
+        ('内線', '入電'): s6.index.map(get_counts('内線', 'target_base', in_biz=True)).fillna(0).astype(int),
+        ('内線', '着電'): s6.index.map(get_counts('内線', 'target_base', in_biz=True, answered=True)).fillna(0).astype(int),
+        ('外線', '入電'): s6.index.map(get_counts('外線', 'target_base', in_biz=True)).fillna(0).astype(int),
+        ('外線', '着電'): s6.index.map(get_counts('外線', 'target_base', in_biz=True, answered=True)).fillna(0).astype(int),
     }
     s6 = pd.DataFrame(s6_data, index=s6.index)
     
@@ -691,17 +890,11 @@ def main():
     s6.loc['合計', ('内線', '応答率')] = s6.loc['合計', ('内線', '着電')] / s6.loc['合計', ('内線', '入電')] if s6.loc['合計', ('内線', '入電')] > 0 else 0.0
     s6.loc['合計', ('外線', '応答率')] = s6.loc['合計', ('外線', '着電')] / s6.loc['合計', ('外線', '入電')] if s6.loc['合計', ('外線', '入電')] > 0 else 0.0
 
-    if not df_ext.empty and 'time' in df_ext.columns:
-        df_ext_clean = df_ext.dropna(subset=['time']).copy()
-        df_ext_biz_all = df_ext_clean[df_ext_clean['time'].apply(lambda t: BIZ_START <= t <= BIZ_END)]
-        N1_val = len(df_ext_biz_all)
-        df_ext_biz_missed = df_ext_biz_all[~df_ext_biz_all['final_name'].apply(is_valid_answer)]
-        O1_val = len(df_ext_biz_missed)
-        P1_val = N1_val - O1_val
-        Q1_val = P1_val / N1_val if N1_val > 0 else 0.0
-        M1_val = s6.loc['合計', ('外線', '入電')]
-    else:
-        M1_val = 0; N1_val = 0; O1_val = 0; P1_val = 0; Q1_val = 0.0
+    N1_val = report_cube.total(cube, channel='外線', in_biz=True)
+    O1_val = report_cube.total(cube, channel='外線', in_biz=True, answered=False)
+    P1_val = N1_val - O1_val
+    Q1_val = P1_val / N1_val if N1_val > 0 else 0.0
+    M1_val = s6.loc['合計', ('外線', '入電')]
 
     s6_header = pd.DataFrame({'表計(入電)': [M1_val], '全入電(N1)': [N1_val], '全不在(O1)': [O1_val], '全着電(P1)': [P1_val], '全応答率(Q1)': [Q1_val]})
 
@@ -723,9 +916,184 @@ def main():
     s6_group_rows.append(['合計', grp6_total_in, grp6_total_ans, grp6_total_rate])
     s6_group_summary = pd.DataFrame(s6_group_rows)
 
+    # --- Sheet 7, 8 (同時通話数) ---
+    # 拠点は「どこ宛てか（Target Base）」で不在も含め、従業員は「誰が取ったか」で着電だけを数える
+    interval = CONCURRENCY_MINUTES * 60
+    conc_cols = ['dt', CONCURRENCY_DURATION_COL, 'target_base', 'final_base', 'final_name', 'answered']
+    conc_frames = [df[conc_cols] for df in calls.values() if set(conc_cols).issubset(df.columns)]
+    s7 = pd.DataFrame()
+    s8 = pd.DataFrame()
+    if conc_frames:
+        conc_all = pd.concat(conc_frames, ignore_index=True)
+        by_base = call_analytics.concurrency(conc_all['dt'], conc_all[CONCURRENCY_DURATION_COL], conc_all[['target_base']], interval)
+        if not by_base.empty:
+            by_base['時間帯'] = by_base['interval_start'].dt.strftime('%H:%M')
+            peak = by_base.pivot_table(index='時間帯', columns='target_base', values='peak', aggfunc='max', fill_value=0)
+            busy = by_base.pivot_table(index='時間帯', columns='target_base', values='average', aggfunc='sum', fill_value=0)
+            # 平均は同時通話数を数えた行のある日数で割る
+            conc_days = max(conc_all['dt'].dt.normalize().nunique(), 1)
+            s7 = pd.DataFrame(index=peak.index)
+            for b in [b for b in sorted_bases if b in peak.columns]:
+                s7[f'{b}_最大'] = peak[b].astype(int)
+                s7[f'{b}_平均'] = (busy[b] / conc_days).round(2)
+            s7 = s7.reset_index()
+
+        conc_ans = conc_all[conc_all['answered']]
+        by_emp = call_analytics.concurrency(conc_ans['dt'], conc_ans[CONCURRENCY_DURATION_COL], conc_ans[['final_base', 'final_name']], interval)
+        if not by_emp.empty:
+            by_emp['multi'] = by_emp['peak'] >= 2
+            grp = by_emp.groupby(['final_base', 'final_name'])
+            s8 = grp.agg(最大同時通話数=('peak', 'max'), 平均同時通話数=('average', 'mean'),
+                         同時2件以上の区間数=('multi', 'sum'), 通話中の区間数=('peak', 'size'))
+            s8['平均同時通話数(通話中の区間)'] = s8.pop('平均同時通話数').round(2)
+            first_peak = by_emp.loc[grp['peak'].idxmax(), ['final_base', 'final_name', 'interval_start']]
+            s8['最大になった時間帯'] = first_peak.set_index(['final_base', 'final_name'])['interval_start'].dt.strftime('%Y-%m-%d %H:%M')
+            s8 = s8.reset_index().rename(columns={'final_base': '拠点', 'final_name': '名前'})
+            s8['base_rank'] = s8['拠点'].apply(lambda x: BASE_ORDER.index(x) if x in BASE_ORDER else 999)
+            s8 = s8.sort_values(['base_rank', '名前']).drop(columns='base_rank')
+            s8 = s8[['拠点', '名前', '最大同時通話数', '最大になった時間帯', '平均同時通話数(通話中の区間)', '同時2件以上の区間数', '通話中の区間数']]
+
+    # --- Sheet 9 (曜日×時間帯×拠点 の入電・着電・応答率) ---
+    # 外線着信を「どこ宛てか（Target Base）」で数える。入電のあった曜日・時間帯の範囲だけを表にする
+    s9 = pd.DataFrame()
+    df_hm = calls.get('外線')
+    if df_hm is not None and 'dt' in df_hm.columns:
+        hm = call_analytics.slot_counts(df_hm['dt'], df_hm[['target_base']], {'着電': df_hm['answered']}, HEATMAP_MINUTES * 60)
+        hm = hm.rename(columns={'count': '入電'})
+        active = hm[hm['入電'] > 0]
+        if not active.empty:
+            hm = hm[hm['weekday'].isin(active['weekday'])
+                    & hm['slot_start'].between(active['slot_start'].min(), active['slot_start'].max())]
+            hm = hm[hm['target_base'].isin(active['target_base'])]
+            table = hm.set_index(['target_base', 'weekday', 'slot_start'])[['入電', '着電']]
+            table['応答率'] = (table['着電'] / table['入電'].where(table['入電'] > 0)).round(3)
+            s9 = table.rename_axis(columns='項目').stack().unstack('slot_start').reset_index()
+            s9.columns = ['拠点', '曜日', '項目'] + [f"{sec // 3600:02d}:{sec % 3600 // 60:02d}" for sec in s9.columns[3:]]
+            s9['base_rank'] = s9['拠点'].apply(lambda x: BASE_ORDER.index(x) if x in BASE_ORDER else 999)
+            s9['item_rank'] = s9['項目'].map({'入電': 0, '着電': 1, '応答率': 2})
+            s9 = s9.sort_values(['base_rank', '拠点', '曜日', 'item_rank']).drop(columns=['base_rank', 'item_rank'])
+            s9['曜日'] = s9['曜日'].map(dict(enumerate(WEEKDAY_NAMES)))
+            # stack で小数になった件数の行を整数に戻す
+            slot_cols = list(s9.columns[3:])
+            count_rows = s9['項目'] != '応答率'
+            s9[slot_cols] = s9[slot_cols].astype(object)
+            s9.loc[count_rows, slot_cols] = s9.loc[count_rows, slot_cols].astype(int)
+
+    # --- Sheet 10 (必要人員) ---
+    # 曜日・時間帯ごとの1日あたり入電数と、拠点ごとの平均通話時間（着電）から必要人数を見積もり、シート3の人員と比べる
+    s10 = pd.DataFrame()
+    if df_hm is not None and 'dt' in df_hm.columns and '通話時間' in df_hm.columns and row_dates:
+        interval = HEATMAP_MINUTES * 60
+        hm = call_analytics.slot_counts(df_hm['dt'], df_hm[['target_base']], interval=interval)
+        # 区間の開始が営業時間内のマスだけ（曜日・拠点ごとの営業時間はほかのシートと同じ判定を使う）
+        slot_dt = (pd.Timestamp('2024-01-01')  # 月曜日
+                   + pd.to_timedelta(hm['weekday'] * 86400 + hm['slot_start'], unit='s'))
+        in_biz = call_features.business_hours_mask(
+            slot_dt, BIZ_START, BIZ_END, include_end=False,
+            by_weekday=BIZ_HOURS_BY_WEEKDAY, by_base=BIZ_HOURS_BY_BASE, base=hm['target_base'])
+        hm = hm[in_biz].copy()
+        # 1日あたりにするときは、数えた行のある日を曜日ごとに数えて割る
+        weekday_days = df_hm['dt'].dropna().dt.normalize().drop_duplicates().dt.weekday.value_counts()
+        hm['入電／日'] = hm['count'] / hm['weekday'].map(weekday_days)
+        hm = hm[hm['入電／日'].notna()]
+
+        talk = df_hm[df_hm['answered']].assign(talk=pd.to_numeric(df_hm['通話時間'], errors='coerce'))
+        aht = talk.groupby('target_base', observed=True)['talk'].mean()
+        hm['aht'] = hm['target_base'].map(aht).fillna(0).astype(float)
+        hm['必要人員'] = staffing.required_agents(
+            staffing.traffic(hm['入電／日'], hm['aht'], interval), hm['aht'], STAFFING_TARGETS)
+
+        if not hm.empty:
+            grp = hm.groupby('target_base')
+            s10 = grp.agg(**{'平均通話時間／秒': ('aht', 'first'), '必要人員_最大': ('必要人員', 'max'), '必要人員_平均': ('必要人員', 'mean')})
+            peak_rows = hm.loc[grp['必要人員'].idxmax()].set_index('target_base')
+            s10['最大になる曜日・時間帯'] = [
+                f"{WEEKDAY_NAMES[w]} {sec // 3600:02d}:{sec % 3600 // 60:02d}" if n > 0 else ''
+                for w, sec, n in zip(peak_rows['weekday'], peak_rows['slot_start'], peak_rows['必要人員'])]
+            s10['営業時間内_入電／日'] = hm.groupby(['target_base', 'weekday'])['入電／日'].sum().groupby('target_base').mean()
+            s10 = s10.reindex([b for b in sorted_bases if b in s10.index])
+            s10.index.name = '拠点名'
+            s10 = s10.reset_index()
+            s10['平均通話時間／秒'] = s10['平均通話時間／秒'].apply(my_round)
+            s10['必要人員_平均'] = s10['必要人員_平均'].apply(my_round)
+            s10['営業時間内_入電／日'] = s10['営業時間内_入電／日'].apply(my_round)
+            s10['人員'] = s10['拠点名'].map(s3.set_index('拠点名')['人員']).fillna(0).astype(int)
+            s10['過不足'] = s10['人員'] - s10['必要人員_最大']
+            s10 = s10[['拠点名', '営業時間内_入電／日', '平均通話時間／秒', '必要人員_最大', '最大になる曜日・時間帯', '必要人員_平均', '人員', '過不足']]
+
+    # --- Sheet 11, 12 (不在着信の折り返し) ---
+    # 外線着信の不在ごとに、その発信番号へ CALLBACK_WINDOW_HOURS 以内にかけた最初の外線発信を探す（非通知は除く）
+    s11 = pd.DataFrame()
+    s12 = pd.DataFrame()
+    if (df_hm is not None and {'dt', '発信番号'}.issubset(df_hm.columns)
+            and not df_out.empty and {'時刻', '着信番号'}.issubset(df_out.columns)):
+        missed = df_hm[~df_hm['answered']].copy()
+        missed['number'] = call_analytics.normalize_number(missed['発信番号'])
+        missed = missed[missed['number'].notna()]
+        cb = call_analytics.match_callbacks(
+            missed['dt'], missed['number'], df_out['時刻'], call_analytics.normalize_number(df_out['着信番号']),
+            pd.Timedelta(hours=CALLBACK_WINDOW_HOURS))
+        missed['delay_min'] = cb['delay'].to_numpy() / 60
+
+        if not missed.empty:
+            def callback_summary(g):
+                d = g['delay_min'].dropna()
+                return pd.Series({'不在': len(g), '折り返し': len(d), '折り返し率': len(d) / len(g) if len(g) else 0.0,
+                                  '折り返しまで_中央値(分)': my_round(d.median()) if len(d) else '',
+                                  '折り返しまで_90%(分)': my_round(d.quantile(0.9)) if len(d) else ''})
+            s11 = missed.groupby('target_base', observed=True)[['delay_min']].apply(callback_summary)
+            s11 = s11.reindex([b for b in sorted_bases if b in s11.index])
+            s11.loc['合計'] = callback_summary(missed)
+            s11.index.name = '拠点名'
+            s11 = s11.reset_index()
+            s11[['不在', '折り返し']] = s11[['不在', '折り返し']].astype(int)
+
+            s12 = missed[missed['delay_min'].isna()][['dt', 'target_base', '発信番号', '着信者']].copy()
+            s12.columns = ['時刻', '拠点', '発信番号', '着信者']
+            s12['base_rank'] = s12['拠点'].apply(lambda x: BASE_ORDER.index(x) if x in BASE_ORDER else 999)
+            s12 = s12.sort_values(['base_rank', '時刻']).drop(columns='base_rank')
+
+    # --- Sheet 13 (繰り返し着信) ---
+    # 同じ番号から REPEAT_WINDOW_MINUTES 以内にかけ直した着信を1つの問い合わせにまとめ（着電したらその問い合わせは終わり）、
+    # 着信件数ベースの応答率と、問い合わせの1回目で出られた率・最終的に出られた率を比べる（非通知は除く）
+    s13 = pd.DataFrame()
+    if df_hm is not None and {'dt', '発信番号'}.issubset(df_hm.columns):
+        rep_calls = df_hm[['dt', 'target_base', 'answered']].copy()
+        rep_calls['number'] = call_analytics.normalize_number(df_hm['発信番号'])
+        rep_calls = rep_calls[rep_calls['number'].notna()]
+        rep_calls = rep_calls.join(call_analytics.repeat_calls(
+            rep_calls['dt'], rep_calls['number'], REPEAT_WINDOW_MINUTES * 60, rep_calls['answered']))
+        rep_calls = rep_calls[rep_calls['episode'] >= 0]
+
+        if not rep_calls.empty:
+            episodes = call_analytics.repeat_episodes(rep_calls)
+            alert_numbers = rep_calls.loc[rep_calls['in_window'] >= REPEAT_ALERT_CALLS, ['target_base', 'number']]
+
+            def repeat_summary(calls, eps, alerts):
+                n_eps = len(eps)
+                return pd.Series({
+                    '入電': len(calls), '発信者数': calls['number'].nunique(), '問い合わせ数': n_eps,
+                    'かけ直しあり': int((eps['attempts'] >= 2).sum()),
+                    f'{REPEAT_WINDOW_MINUTES}分に{REPEAT_ALERT_CALLS}回以上の発信者': alerts['number'].nunique(),
+                    '入電ベース_応答率': calls['answered'].mean() if len(calls) else 0.0,
+                    '1回目で着電率': eps['first_answered'].mean() if n_eps else 0.0,
+                    '最終的な着電率': eps['any_answered'].mean() if n_eps else 0.0})
+
+            bases = [b for b in sorted_bases if b in set(episodes['target_base'].dropna()) | set(rep_calls['target_base'].dropna())]
+            s13 = pd.DataFrame({b: repeat_summary(rep_calls[rep_calls['target_base'] == b],
+                                                  episodes[episodes['target_base'] == b],
+                                                  alert_numbers[alert_numbers['target_base'] == b]) for b in bases}).T
+            s13.loc['合計'] = repeat_summary(rep_calls, episodes, alert_numbers)
+            count_cols = ['入電', '発信者数', '問い合わせ数', 'かけ直しあり', f'{REPEAT_WINDOW_MINUTES}分に{REPEAT_ALERT_CALLS}回以上の発信者']
+            s13[count_cols] = s13[count_cols].astype(int)
+            s13.index.name = '拠点名'
+            s13 = s13.reset_index()
+
     # 4. 出力
     print("\n集計中...")
     output_filename = f"集計結果_{datetime.date.today()}.xlsx"
+    if start or end:
+        output_filename = f"集計結果_{datetime.date.today()}_{start or ''}〜{end or ''}.xlsx"
     
     try:
         with pd.ExcelWriter(output_filename) as writer:
@@ -750,6 +1118,12 @@ def main():
             s6_header.to_excel(writer, sheet_name='6.時間内集計', index=False, startrow=0, startcol=12)
             s6_group_summary.to_excel(writer, sheet_name='6.時間内集計', index=False, header=False, startrow=4, startcol=12)
 
+            for sheet, table in [('7.同時通話_拠点', s7), ('8.同時通話_従業員', s8), ('9.時間帯別_入電', s9), ('10.必要人員', s10),
+                                 ('11.折り返し', s11), ('12.折り返しなし', s12),
+                                 ('13.繰り返し着信', s13)]:
+                if not table.empty: table.to_excel(writer, sheet_name=sheet, index=False)
+                else: pd.DataFrame({'info': ['データなし']}).to_excel(writer, sheet_name=sheet, index=False)
+
         print(f"\n★★ 完了しました！ ★★")
         print(f"作成されたファイル: {output_filename}")
         